@@ -0,0 +1,64 @@
+"""
+Scripted reruns of the Streamlit app through AppTest (see rerun.py for the interactions).
+"""
+import os
+
+import pytest
+
+from conftest import ROOT
+from rerun import edit_on_results_tab, find
+
+AppTest = pytest.importorskip('streamlit.testing.v1').AppTest
+
+APP = os.path.join(ROOT, 'finish_mondial_kpis', 'app.py')
+
+
+@pytest.fixture
+def app():
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.run()
+    assert not at.exception
+    return at
+
+
+def _rerun(at):
+    at.run()
+    assert not at.exception
+
+
+def bench_first_run(benchmark):
+    def run():
+        at = AppTest.from_file(APP, default_timeout=120)
+        _rerun(at)
+
+    benchmark.pedantic(run, rounds=3, iterations=1)
+
+
+def bench_edit_land_coverage(benchmark, app):
+    values = iter(range(1, 1_000_000))
+
+    def setup():
+        find(app.number_input, "Land Coverage (acres)").set_value(500.0 + next(values))
+        return (app,), {}
+
+    benchmark.pedantic(_rerun, setup=setup, rounds=10)
+
+
+def bench_edit_land_coverage_on_results(benchmark, app):
+    values = iter(range(1, 1_000_000))
+
+    def setup():
+        edit_on_results_tab(app, 600.0 + next(values))
+        return (app,), {}
+
+    benchmark.pedantic(_rerun, setup=setup, rounds=10)
+
+
+def bench_edit_parameter(benchmark, app):
+    values = iter(range(1, 1_000_000))
+
+    def setup():
+        app.number_input(key='const_plastic_emission_factor').set_value(2.0 + next(values) / 100)
+        return (app,), {}
+
+    benchmark.pedantic(_rerun, setup=setup, rounds=10)
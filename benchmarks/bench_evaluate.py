@@ -0,0 +1,95 @@
+"""
+KPI evaluation: all sections at once, each section on its own, per-quarter series, equations and reports.
+"""
+import io
+
+import numpy as np
+import pytest
+
+from finish_mondial_kpis.calculations import (
+    EQUATIONS, SECTIONS, calculate, calculate_series, generate_latex, load_constants, parameter_values
+)
+from finish_mondial_kpis.equations import build_equations
+from finish_mondial_kpis.projects import get_quarterly_colnames, parse_csv_file
+from finish_mondial_kpis.reports import WorkbookWriter, project_report, render_reports, write_reports
+from finish_mondial_kpis.sensitivity import elasticities, one_at_a_time, sensitivity_inputs
+from synthetic import make_project_csv
+
+
+@pytest.fixture(scope='module')
+def const():
+    return load_constants()
+
+
+@pytest.fixture(scope='module')
+def project():
+    return parse_csv_file(io.StringIO(make_project_csv(5)))
+
+
+def _inputs(project, const):
+    return project.sums(), const.value(project.conversion_factor_name), project.land_coverage
+
+
+def bench_calculate(benchmark, project, const):
+    sums, factor, land_coverage = _inputs(project, const)
+    results = benchmark(calculate, sums, const, factor, land_coverage)
+    assert set(results) == set(SECTIONS)
+
+
+@pytest.mark.parametrize('calc_key', sorted(EQUATIONS.section_kernels))
+def bench_section(benchmark, project, const, calc_key):
+    # The math of calculate_and_display for one section, without the Streamlit output
+    sums, factor, land_coverage = _inputs(project, const)
+    values = parameter_values(sums, const, factor, land_coverage)
+    benchmark(EQUATIONS.section_kernels[calc_key].evaluate, values)
+
+
+@pytest.mark.parametrize('num_years', [1, 10])
+def bench_calculate_series(benchmark, const, num_years):
+    project = parse_csv_file(io.StringIO(make_project_csv(num_years)))
+    _, factor, land_coverage = _inputs(project, const)
+    benchmark(calculate_series, project.quarterly, get_quarterly_colnames(num_years), const, factor,
+              land_coverage)
+
+
+@pytest.mark.parametrize('num_projects', [1, 10_000])
+def bench_elasticities(benchmark, project, const, num_projects):
+    sums, factor, land_coverage = _inputs(project, const)
+    scale = np.linspace(0.5, 1.5, num_projects)
+    values = parameter_values({key: total * scale for key, total in sums.items()}, const, factor, land_coverage * scale)
+    result = benchmark(elasticities, values, sensitivity_inputs(const))
+    assert result.shape[1:] == (num_projects,)
+
+
+def bench_one_at_a_time(benchmark, project, const):
+    sums, factor, land_coverage = _inputs(project, const)
+    values = parameter_values(sums, const, factor, land_coverage)
+    benchmark(one_at_a_time, values, sensitivity_inputs(const), 0.1)
+
+
+def bench_generate_latex(benchmark):
+    benchmark(lambda: [generate_latex(calc_key) for calc_key in SECTIONS])
+
+
+def bench_project_report(benchmark, project, const):
+    text = benchmark(project_report, 'synthetic', project, const)
+    assert text.startswith('# synthetic')
+
+
+def bench_workbook(benchmark, project, const, tmp_path):
+    # Reports and workbook rows of 1000 projects, rendered in this process
+    pytest.importorskip('xlsxwriter')
+    items = [(f'p{i}', project) for i in range(1000)]
+
+    def export():
+        workbook = WorkbookWriter(str(tmp_path / 'portfolio.xlsx'), const)
+        return write_reports(render_reports(items, const, workers=1), lambda name, text: None, workbook)
+
+    assert benchmark.pedantic(export, rounds=3, iterations=1) == 1000
+
+
+def bench_build_equations(benchmark):
+    # What a stale or missing equations artifact costs at startup (sympy rendering and compiling);
+    # a single round, since sympy caches its work within the process
+    equations = benchmark.pedantic(build_equations, args=(EQUATIONS.key,), rounds=1, iterations=1)
+    assert equations.sections.keys() == SECTIONS.keys()
@@ -0,0 +1,25 @@
+"""
+Project file ingestion: parsing CSVs and building the quarterly table shown in the app.
+"""
+import io
+
+import pytest
+
+from finish_mondial_kpis.projects import create_quarterly_dataframe, get_quarterly_colnames, parse_csv_file
+from synthetic import make_project_csv
+
+
+@pytest.mark.parametrize('num_years', [1, 10, 100, 1000])
+def bench_parse_csv_file(benchmark, num_years):
+    content = make_project_csv(num_years)
+    benchmark.extra_info['bytes'] = len(content)
+    project = benchmark(lambda: parse_csv_file(io.StringIO(content)))
+    assert project.num_years == num_years
+
+
+@pytest.mark.parametrize('num_years', [1, 2, 5, 10])
+def bench_create_quarterly_dataframe(benchmark, num_years):
+    project = parse_csv_file(io.StringIO(make_project_csv(num_years)))
+    quarterly_cols = get_quarterly_colnames(num_years)
+    df = benchmark(create_quarterly_dataframe, project, num_years, quarterly_cols)
+    assert list(df.columns[-len(quarterly_cols):]) == quarterly_cols
@@ -0,0 +1,17 @@
+"""
+Cold import time of the package, each round in a fresh interpreter.
+"""
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+
+
+@pytest.mark.parametrize('module', ['finish_mondial_kpis.calculations', 'finish_mondial_kpis.cli'])
+def bench_import(benchmark, module):
+    def run():
+        subprocess.run([sys.executable, '-c', f'import {module}'], cwd=ROOT, check=True)
+
+    benchmark.pedantic(run, rounds=5, iterations=1, warmup_rounds=1)
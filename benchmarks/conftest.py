@@ -0,0 +1,17 @@
+"""
+Benchmark suite for ingestion, evaluation, startup and app rerun latency (pytest-benchmark).
+
+    pip install -e ".[benchmark]"
+    pytest benchmarks                                     # saved to .benchmarks/ as JSON, per commit
+    pytest benchmarks --benchmark-compare                 # compare with the previous saved run
+    pytest-benchmark compare 0001 0002 --group-by=name    # compare two saved runs
+
+Every run is saved as JSON (with the commit id and machine info) under .benchmarks/, so
+regressions can be compared between commits.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -0,0 +1,113 @@
+"""
+Load test of the KPI service: concurrent clients posting synthetic projects, reporting latency percentiles.
+
+    python benchmarks/loadtest.py                      # starts a local instance on a free port
+    python benchmarks/loadtest.py --url http://127.0.0.1:8000
+
+A fraction of the requests (--repeat) reuse a payload sent before, to exercise the response cache.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from synthetic import make_project_csv
+
+
+def start_local_service():
+    """Run the service with uvicorn in a background thread and return its URL."""
+    import uvicorn
+    from finish_mondial_kpis.service import create_app
+
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(create_app(), host='127.0.0.1', port=port, log_level='warning'))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f'http://127.0.0.1:{port}'
+
+
+def make_payloads(n_requests, repeat, batch_size, num_years, seed=0):
+    """(path, body) per request; a `repeat` fraction repeats an earlier body."""
+    rng = random.Random(seed)
+    templates = [make_project_csv(num_years, seed=i).split('\n') for i in range(8)]
+    payloads = []
+    for i in range(n_requests):
+        if payloads and rng.random() < repeat:
+            payloads.append(rng.choice(payloads))
+            continue
+        # Vary the land coverage (line 8) so new payloads miss the cache
+        projects = []
+        for _ in range(batch_size):
+            lines = list(rng.choice(templates))
+            lines[7] = f'{rng.uniform(1, 1000):.3f},,,,'
+            projects.append('\n'.join(lines))
+        if batch_size == 1:
+            payloads.append(('/kpis', json.dumps({'csv': projects[0]}).encode()))
+        else:
+            payloads.append(('/batch', json.dumps({'projects': projects}).encode()))
+    return payloads
+
+
+def run(url, payloads, concurrency):
+    """Send every payload using `concurrency` persistent connections; returns latencies in seconds."""
+    parts = urlsplit(url)
+    local = threading.local()
+
+    def post(payload):
+        if not hasattr(local, 'connection'):
+            local.connection = http.client.HTTPConnection(parts.hostname, parts.port)
+        path, body = payload
+        start = time.perf_counter()
+        local.connection.request('POST', path, body, {'Content-Type': 'application/json'})
+        response = local.connection.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"{path}: HTTP {response.status}")
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        return np.array(list(executor.map(post, payloads)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', help="Service to test (default: start a local instance)")
+    parser.add_argument('-n', '--requests', type=int, default=2000)
+    parser.add_argument('-c', '--concurrency', type=int, default=16)
+    parser.add_argument('--repeat', type=float, default=0.5, help="Fraction of repeated payloads (default: 0.5)")
+    parser.add_argument('--batch-size', type=int, default=1, help="Projects per request; >1 uses /batch")
+    parser.add_argument('--years', type=int, default=3, help="Years of quarterly data per project")
+    args = parser.parse_args()
+
+    url = args.url or start_local_service()
+    payloads = make_payloads(args.requests, args.repeat, args.batch_size, args.years)
+    start = time.perf_counter()
+    latencies = run(url, payloads, args.concurrency)
+    elapsed = time.perf_counter() - start
+
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    print(f"{len(latencies)} requests in {elapsed:.2f}s ({len(latencies) / elapsed:.0f} req/s, "
+          f"{len(latencies) * args.batch_size / elapsed:.0f} projects/s), concurrency {args.concurrency}")
+    print(f"latency p50 {p50:.2f} ms, p99 {p99:.2f} ms, max {latencies.max() * 1000:.2f} ms")
+
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port)
+    connection.request('GET', '/health')
+    print(f"cache: {json.loads(connection.getresponse().read())['cache']}")
+
+
+if __name__ == '__main__':
+    main()
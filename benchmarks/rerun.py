@@ -0,0 +1,98 @@
+"""
+Rerun latency of the Streamlit app for typical interactions, scripted with AppTest.
+
+    python benchmarks/rerun.py                  # finish_mondial_kpis/app.py
+    python benchmarks/rerun.py --app old_app.py # e.g. a previous version, for before/after numbers
+
+Downloads through requests.get are served from the packaged images so runs do not depend on
+the network; the number of downloads per rerun is reported instead.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+class _LocalResponse:
+    status_code = 200
+
+    def __init__(self, content):
+        self.content = content
+
+
+def patch_downloads():
+    """Serve requests.get from the packaged images and count the calls."""
+    calls = []
+
+    def get(url, *args, **kwargs):
+        calls.append(url)
+        with open(os.path.join(ROOT, 'finish_mondial_kpis', 'images', url.rsplit('/', 1)[-1]), 'rb') as f:
+            return _LocalResponse(f.read())
+
+    requests.get = get
+    return calls
+
+
+def timed(at, interact):
+    interact(at)
+    start = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception)
+    return elapsed
+
+
+def find(widgets, label):
+    return next(widget for widget in widgets if widget.label == label)
+
+
+def edit_on_results_tab(at, land_coverage):
+    # AppTest does not send the selected tab back like a browser does, so select it explicitly
+    at.session_state['tab'] = "Calculations & Results"
+    find(at.number_input, "Land Coverage (acres)").set_value(land_coverage)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--app', default=os.path.join(ROOT, 'finish_mondial_kpis', 'app.py'))
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    from streamlit.testing.v1 import AppTest
+
+    calls = patch_downloads()
+    at = AppTest.from_file(args.app, default_timeout=120)
+    start = time.perf_counter()
+    at.run()
+    print(f"{'first run':<28}{(time.perf_counter() - start) * 1000:9.1f} ms")
+
+    interactions = {
+        'edit land coverage': lambda at, i: find(at.number_input, "Land Coverage (acres)").set_value(500.0 + i),
+        'edit a parameter': lambda at, i: at.number_input(key='const_plastic_emission_factor').set_value(2.0 + i / 10),
+        'change climate': lambda at, i: at.selectbox[1].select_index(i % 3),
+        'open results': lambda at, i: find(at.button, "View Results").click(),
+        'edit land coverage (results)': lambda at, i: edit_on_results_tab(at, 600.0 + i),
+        'back to inputs': lambda at, i: find(at.button, "← Back to Data Input").click(),
+    }
+    for name, interaction in interactions.items():
+        calls.clear()
+        times = []
+        for i in range(args.repeat):
+            times.append(timed(at, lambda at: interaction(at, i)))
+            if name in ('open results', 'back to inputs') and i + 1 < args.repeat:
+                # return to the state the interaction starts from
+                other = "← Back to Data Input" if name == 'open results' else "View Results"
+                find(at.button, other).click().run()
+        print(f"{name:<28}{statistics.median(times) * 1000:9.1f} ms median, "
+              f"{max(times) * 1000:9.1f} ms max, {len(calls) / args.repeat:.1f} downloads/rerun")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+"""
+Synthetic project data for the benchmarks.
+"""
+import numpy as np
+
+from finish_mondial_kpis.mappings import DATA_CATEGORIES
+from finish_mondial_kpis.projects import get_quarterly_colnames
+
+
+def make_project_csv(num_years, seed=0):
+    """Project CSV text in the standard format with random quarterly data for `num_years` years."""
+    rng = np.random.default_rng(seed)
+    lines = [
+        'Climate ("temperate_wet" "tropical_wet" or "dry"),,,,',
+        'tropical_wet,,,,',
+        ',,,,',
+        'Landfill depth ("shallow" if <5m or "deep" if >5m),,,,',
+        'deep,,,,',
+        ',,,,',
+        'Land Coverage (acres),,,,',
+        f'{rng.integers(50, 1000)},,,,',
+        ',,,,',
+        '# Quarterly Data',
+        ",".join(["Category"] + get_quarterly_colnames(num_years)),
+    ]
+    for category_name in DATA_CATEGORIES.values():
+        values = rng.uniform(0, 100, num_years * 4).round(2)
+        lines.append(",".join([category_name] + [str(value) for value in values]))
+    return "\n".join(lines)
@@ -1,17 +1,36 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
+import functools
 import io
 import os
-import glob
-import time
-import base64
-import requests
-import streamlit.components.v1 as components
-
-from mappings import (
-    DATA_CATEGORIES, CLIMATE_OPTIONS, LANDFILL_OPTIONS, DISPLAY_MAP, QUARTERS
+import sys
+import sqlite3
+
+# Allow `streamlit run app.py` from a checkout without installing the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from finish_mondial_kpis.mappings import (
+    DATA_CATEGORIES, CLIMATE_OPTIONS, LANDFILL_OPTIONS, DISPLAY_MAP
+    )
+from finish_mondial_kpis.calculations import (
+    display_section, calculate_series, load_constants, parameter_values, total_co2_saved,
+    data_source, KERNEL, KPI_LABELS, TOTAL_CO2_OUTPUT
+    )
+from finish_mondial_kpis.projects import (
+    parse_csv_file, create_quarterly_dataframe, get_quarterly_colnames, create_csv_template, quarterly_array,
+    ProjectFileError, ProjectRecord
     )
-from calculations import calculate_and_display, base_url
+from finish_mondial_kpis import profiling
+from finish_mondial_kpis.assets import LOGO_WIDTH, BANNER_HEIGHT, banner_uri, logo_uri
+from finish_mondial_kpis.bulk import parse_uploads, portfolio_summary
+from finish_mondial_kpis.evaluator import Evaluator
+from finish_mondial_kpis.parameters import ParameterOverlay, ParameterSet
+from finish_mondial_kpis.portfolio import Portfolio, is_portfolio
+from finish_mondial_kpis.reports import project_report, report_archive, workbook_available
+from finish_mondial_kpis.scenarios import evaluate_grid
+from finish_mondial_kpis.sensitivity import elasticities, one_at_a_time, project_elasticities, sensitivity_inputs
+from finish_mondial_kpis.store import ResultStore, project_key
+from finish_mondial_kpis.uncertainty import monte_carlo, input_distributions, DISTRIBUTIONS
 
 st.set_page_config(
     page_title="Safe Sanitation and Climate Mitigation Calculator",
@@ -19,6 +38,10 @@ st.set_page_config(
     layout="wide"
 )
 
+# Per-stage timings of each rerun, with FINISH_KPIS_PROFILE set or ?profile=1 in the URL
+st.session_state.profile = profiling.enabled() or st.query_params.get('profile') == '1'
+profiling.start_run('rerun', enable=st.session_state.profile)
+
 # CSS for left-aligned LaTeX equations and non-clickable images
 # Generated with Claude 
 st.markdown("""
@@ -50,108 +73,64 @@ button[aria-label="Fullscreen"] {
 </style>
 """, unsafe_allow_html=True)
 
-def parse_csv_file(content):
-    """Parse CSV file in the known format and return project data."""
-    lines = content.strip().split('\n')
-    climate_setting = lines[1].split(',')[0].strip()
-    landfill_setting = lines[4].split(',')[0].strip()
-    land_coverage = float(lines[7].split(',')[0].strip())
-    
-    # Parse quarterly data (starts at line 10, skip the comment line)
-    data_content = "\n".join(lines[10:])  # Start from line 11 (index 10) to skip "# Quarterly Data"
-    df = pd.read_csv(io.StringIO(data_content), index_col=0)
-    
-    # Convert to project data format
-    project_data = {}
-    for category, var_name in DATA_CATEGORIES.items():
-        for quarter in QUARTERS:
-            project_data[f'{category}_q{quarter}'] = df.loc[var_name, f'Y1Q{quarter}']
-    project_data['climate'] = climate_setting
-    project_data['landfill_depth'] = landfill_setting
-    project_data['land_coverage'] = land_coverage
-    
-    return project_data
-
-
-def create_quarterly_dataframe(project_data, num_years, quarterly_cols):
-    """Create quarterly data DataFrame from project data and number of years."""    
-    # Build data rows
-    data = []
-    for category_key, category_name in DATA_CATEGORIES.items():
-        row = [category_name]  # initialize row
-        for year in range(1, num_years + 1):
-            for quarter in QUARTERS:
-                row.append(project_data.get(f'{category_key}_q{quarter}', 0.0))
-        data.append(row)
-    
-    df = pd.DataFrame(data, columns=[''] + quarterly_cols)
-    df = df.set_index('')
-    
-    # Convert numeric columns
-    for col in df.columns:
-        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-    
-    return df
-
 @st.cache_data
 def load_projects_cached():
     """Load all project data with caching."""
     projects = {}
-    # List of project files from GitHub
-    project_files = ["arrp","coonoor_mcc", "custom", "krrp"]
-    for project_file in project_files:
+    for project_file in data_source.list_projects():
         project_name = project_file.replace('_', ' ').upper()
-        response = requests.get(f"{base_url}data/projects/{project_file}.csv")
-        project_data = parse_csv_file(response.text)
-        projects[project_name] = project_data
+        projects[project_name] = parse_csv_file(data_source.read_text(f"data/projects/{project_file}.csv"))
     return projects
 
-@st.cache_data
+@st.cache_resource
 def load_constants_cached():
-    """Load constants from CSV and return as dictionary."""
-    constants_df = pd.read_csv(f"{base_url}data/global_parameters.csv")
-    return {row['name']: {
-        'value': row['value'], 
-        'units': row['units'], 
-        'source': row['source'], 
-        'section': row['section'],
-        'latex_name': row['latex_name']
-    } for _, row in constants_df.iterrows()}
-
-def get_quarterly_colnames(num_years):
-    """Generate quarterly column names for a given number of years."""
-    return [f"Y{year}Q{quarter}" for year in range(1, num_years + 1) for quarter in QUARTERS]
-
-def create_csv_template(num_years):
-    """Create CSV template in the new format."""
-    lines = [
-        'Climate ("temperate_wet" "tropical_wet" or "dry"),,,,',
-        'tropical_wet,,,',
-        ',,,',
-        'Landfill depth ("shallow" if <5m or "deep" if >5m),,,,',
-        'deep,,,',
-        ',,,',
-        'Land Coverage (acres),,,,',
-        '500,,,',
-        ',,,',
-        "# Quarterly Data",
-        ",".join(["Category"] + get_quarterly_colnames(num_years))
-    ]
-    
-    # Add data rows
-    for category_name in DATA_CATEGORIES.values():
-        row = [category_name] + ["0.0"] * len(get_quarterly_colnames(num_years))
-        lines.append(",".join(row))
-    
-    return "\n".join(lines)
+    """Load constants from CSV once per process (the set is immutable, so sessions share it uncopied)."""
+    return load_constants()
+
+@st.cache_resource
+def open_result_store():
+    """Result store shared by every session (and batch runs); None if the cache directory is unusable."""
+    try:
+        return ResultStore()
+    except (OSError, sqlite3.Error):
+        return None
 
-# Load data
-const = load_constants_cached()
-projects = load_projects_cached()
+@st.cache_data(hash_funcs={ParameterSet: lambda parameters: parameters.version})
+def calculate_series_cached(quarterly, quarterly_cols, const, landfill_conversion_factor, land_coverage):
+    """Evaluate the per-quarter series, cached on the parameter set's content hash."""
+    return calculate_series(quarterly, quarterly_cols, const, landfill_conversion_factor, land_coverage)
+
+@st.cache_resource
+def open_portfolio(path, modified):
+    """Open a portfolio directory once per import (`modified` is when it was last written)."""
+    return Portfolio(path)
+
+@st.cache_data(hash_funcs={ParameterSet: lambda parameters: parameters.version})
+def portfolio_co2_cached(path, modified, const, by):
+    """Yearly CO2 saved of a whole portfolio per group, cached on the parameter set's content hash."""
+    return open_portfolio(path, modified).co2_by_year(const, by=by)
+
+@st.cache_data(hash_funcs={ParameterSet: lambda parameters: parameters.version})
+def portfolio_elasticities_cached(path, modified, const):
+    """Elasticities of the total CO2 saved for every project of a portfolio."""
+    return open_portfolio(path, modified).elasticities(const)
+
+@st.cache_data
+def run_uncertainty_cached(values, distributions, n_samples):
+    """Run the Monte Carlo analysis, cached on its inputs (fixed seed so reruns agree)."""
+    return monte_carlo(KERNEL, values, distributions, n_samples, seed=0)
+
+# Load data; parameter edits are kept per session on top of the shared constants
+with profiling.stage('load data'):
+    default_const = load_constants_cached()
+    if 'parameters' not in st.session_state or st.session_state.parameters.base != default_const:
+        st.session_state.parameters = ParameterOverlay(default_const)
+    overlay = st.session_state.parameters
+    projects = load_projects_cached()
 
 # Sidebar
 with st.sidebar:
-    st.image("https://raw.githubusercontent.com/dalyw/finish-mondial-kpis/refs/heads/main/finish_mondial_kpis/images/logo_finish-wit-retina.png", width=200)
+    st.image(logo_uri(), width=LOGO_WIDTH)
     st.markdown("---")
     
     st.header("About FINISH Mondial")
@@ -169,13 +148,11 @@ with st.sidebar:
     """)
 
 # Main content
-response = requests.get(f"{base_url}images/hqdefault.jpg")
-img_base64 = base64.b64encode(response.content).decode()
 st.markdown(
     f"""
     <div style="position: relative; width: 100%; height: 200px; margin-bottom: -300px;">
-        <img src="data:image/jpeg;base64,{img_base64}" 
-                style="position: absolute; top: 0; left: 0; width: 100%; height: 150px; 
+        <img src="{banner_uri()}" 
+                style="position: absolute; top: 0; left: 0; width: 100%; height: {BANNER_HEIGHT}px; 
                     object-fit: cover; opacity: 0.4; z-index: 0;" />
         <div style="position: absolute; top: 20px; left: 0; width: 100%; 
                     text-align: right; z-index: 1;">
@@ -188,28 +165,305 @@ st.markdown(
 st.title("Safe Sanitation and Climate Mitigation Calculator")
 
 
+TABS = ["Data Input", "Calculations & Results"]
+
+
 def switch_tab(tab):
-    """Switch to the specified tab (0 for Data Input, 1 for Calculations & Results)."""
-    script_placeholder = st.empty()
-    components.html(f"""
-    <script>
-    var tabGroup = window.parent.document.getElementsByClassName("stTabs")[0]
-    var tab = tabGroup.getElementsByTagName("button")
-    tab[{tab}].click()
-    </script>
-    """, height=0)
-    time.sleep(0.1)
-    script_placeholder.empty()
+    """Switch to the specified tab (0 for Data Input, 1 for Calculations & Results); a button callback."""
+    st.session_state.tab = TABS[tab]
+
+
+def parameter_label(name):
+    return name.replace('_', ' ').title()
+
+
+def lazy_expander(label, key):
+    """Expander that reruns when opened or closed; None while it is collapsed, so its panel can skip its work."""
+    panel = st.expander(label, key=key, on_change="rerun")
+    return panel if panel.open else None
+
+
+def bulk_upload(uploads):
+    """Parse a set of uploaded files (with a progress bar) once; reruns reuse the result until the files change."""
+    key = tuple(upload.file_id for upload in uploads)
+    cached = st.session_state.get('bulk_upload')
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    progress = st.progress(0.0, text="Reading files…")
+
+    def on_progress(done, total, file):
+        progress.progress(done / total, text=f"Read {done} of {total} files")
+
+    bulk = parse_uploads(uploads, on_progress=on_progress)
+    progress.empty()
+    st.session_state.bulk_upload = (key, bulk)
+    return bulk
+
+
+def reports_download(items, const):
+    """Download button for a ZIP of every project's report (and the workbook, with xlsxwriter installed).
+
+    `items()` gives the (name, ProjectRecord) pairs; the archive is only built when the button is clicked.
+    """
+    workbook = workbook_available()
+    st.download_button("📥 Download reports and workbook (ZIP)" if workbook else "📥 Download reports (ZIP)",
+                       lambda: report_archive(items(), const, workbook=workbook),
+                       file_name="reports.zip", mime="application/zip")
+
+
+def profiled(func):
+    """Time a fragment as a stage of the full rerun, or as a run of its own when it reruns alone."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with profiling.run(func.__name__, enable=st.session_state.get('profile', False)) as run:
+            result = func(*args, **kwargs)
+        if run is not None:
+            st.session_state.setdefault('profile_runs', []).append(run)
+        return result
+    return wrapper
+
+
+def profile_panel(run):
+    """Timing breakdown of this rerun and of the fragment reruns since the previous one, in the sidebar."""
+    fragment_runs = st.session_state.pop('profile_runs', [])
+    with st.sidebar.expander("⏱️ Timing breakdown"):
+        st.caption(f"Last full rerun: {run.elapsed * 1000:.1f} ms")
+        st.dataframe(pd.DataFrame({
+            'stage': ["\u2003" * depth + name for name, depth, _ in run.stages],
+            'ms': [seconds * 1000 for _, _, seconds in run.stages],
+        }).style.format({'ms': "{:.2f}"}), hide_index=True)
+        if fragment_runs:
+            st.caption("Fragment reruns since")
+            st.dataframe(pd.DataFrame({
+                'fragment': [fragment_run.name for fragment_run in fragment_runs],
+                'ms': [fragment_run.elapsed * 1000 for fragment_run in fragment_runs],
+            }).style.format({'ms': "{:.2f}"}), hide_index=True)
+
+
+@st.fragment
+@profiled
+def project_inputs(name, project, df, quarterly_cols):
+    """Climate, landfill depth, land coverage and quarterly data inputs.
+
+    Edits rerun only this fragment; the values are kept in st.session_state.inputs for the results tab.
+    """
+    # Climate and Landfill Conditions (after data loading from csv or project list)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        selected_climate = st.selectbox("Select Climate Condition", list(CLIMATE_OPTIONS.keys()),
+                                    index=list(CLIMATE_OPTIONS.keys()).index(DISPLAY_MAP[project.climate]))
+    with col2:
+        selected_landfill = st.selectbox("Select Landfill Depth", list(LANDFILL_OPTIONS.keys()),
+                                        index=list(LANDFILL_OPTIONS.keys()).index(DISPLAY_MAP[project.landfill_depth]))
+
+    with col3:
+        # Get conversion factor based on climate and landfill depth combination
+        climate_key = CLIMATE_OPTIONS[selected_climate]
+        landfill_key = LANDFILL_OPTIONS[selected_landfill]
+        landfill_conversion_factor = st.session_state.parameters.value(f"{climate_key}_{landfill_key}")
+        st.metric("Conversion Factor", f"{landfill_conversion_factor:.2f}")
+
+    # Land Coverage Input
+    land_coverage = st.number_input(
+        "Land Coverage (acres)",
+        min_value=0.0, value=project.land_coverage, step=5.0, format="%.0f"
+    )
+
+    # Display editable table
+    column_config = {
+        col: st.column_config.NumberColumn(col, min_value=0.0, step=0.1)
+        for col in quarterly_cols
+    } 
+    st.write("Edit the values below:")
+    edited_df = st.data_editor(df, column_config=column_config)
+
+    # Extract values from edited DataFrame as one (category x quarter) array
+    st.session_state.inputs = {
+        'name': name,
+        'quarterly': quarterly_array(edited_df, quarterly_cols),
+        'quarterly_cols': quarterly_cols,
+        'climate_key': climate_key,
+        'landfill_key': landfill_key,
+        'land_coverage': land_coverage,
+    }
+
+
+@st.fragment
+@profiled
+def parameter_panel():
+    """Collapsible constants section; edits rerun only this fragment (and the page if the conversion factor changes)."""
+    overlay = st.session_state.parameters
+    inputs = st.session_state.inputs
+    factor_name = f"{inputs['climate_key']}_{inputs['landfill_key']}"
+    landfill_conversion_factor = overlay.value(factor_name)
+
+    with st.expander("🔧 Adjust Parameters", expanded=False):
+        st.write("Modify calculation parameters below. Changes will be applied to all calculations.")
+        
+        # Group constants by section (excluding Conversions)
+        sections = sorted({data.section for data in overlay.base.values() if data.section != 'Conversions'})
+        for section in sections:
+            st.subheader(f"Part {section} Parameters")
+            section_constants = [data for data in overlay.base.values() if data.section == section]
+            cols = st.columns(3)
+            
+            for i, data in enumerate(section_constants):
+                with cols[i % 3]:
+                    overlay.set(data.name, st.number_input(
+                        parameter_label(data.name),
+                        value=data.value,
+                        help=f"{data.units} - Source: {data.source}",
+                        key=f"const_{data.name}"
+                    ))
+        if overlay.overrides:
+            st.caption(f"{len(overlay.overrides)} parameter(s) changed from the defaults")
+
+    if overlay.value(factor_name) != landfill_conversion_factor:
+        st.rerun()  # the conversion factor shown with the inputs changed
+
+
+@st.fragment
+@profiled
+def trends_panel(quarterly, quarterly_cols, const, landfill_conversion_factor, land_coverage):
+    """Trends over the reporting horizon."""
+    panel = lazy_expander("📈 Trends", "trends_panel")
+    if panel is None:
+        return
+    with panel:
+        series = calculate_series_cached(quarterly, quarterly_cols, const, landfill_conversion_factor, land_coverage)
+        period = st.radio("Show", ["Per quarter", "Per year", "Cumulative"], horizontal=True)
+        chart_data = {"Per quarter": series.quarterly, "Per year": series.yearly,
+                      "Cumulative": series.cumulative}[period]
+        kpis = st.multiselect("Results", list(chart_data.columns), default=[TOTAL_CO2_OUTPUT],
+                              format_func=lambda output: KPI_LABELS[output][0])
+        if kpis:
+            st.line_chart(chart_data[kpis].rename(columns=lambda output: KPI_LABELS[output][0]))
+
+
+@st.fragment
+@profiled
+def scenarios_panel(values, const, land_coverage):
+    """Scenario comparison over climate, landfill depth, land coverage and parameter ranges."""
+    panel = lazy_expander("🗺️ Scenarios", "scenarios_panel")
+    if panel is None:
+        return
+    with panel:
+        st.write("Compare every combination of the settings below for this project's data.")
+        col1, col2 = st.columns(2)
+        with col1:
+            scenario_climates = st.multiselect("Climates", list(CLIMATE_OPTIONS), default=list(CLIMATE_OPTIONS))
+            scenario_landfills = st.multiselect("Landfill depths", list(LANDFILL_OPTIONS), default=list(LANDFILL_OPTIONS))
+        with col2:
+            max_coverage = max(2 * land_coverage, 1000.0)
+            coverage_range = st.slider("Land coverage (acres)", 0.0, max_coverage, (0.0, max_coverage))
+            coverage_steps = st.number_input("Land coverage steps", min_value=1, max_value=1000, value=11)
+
+        sweepable = [name for name in KERNEL.inputs if name in const and const[name].section != 'Conversions']
+        swept = st.multiselect("Parameters to sweep", sweepable, format_func=parameter_label)
+        sweeps = {}
+        for name in swept:
+            col1, col2 = st.columns(2)
+            with col1:
+                spread = st.slider(f"{parameter_label(name)} range (± %)", 0, 100, 20, key=f"sweep_{name}")
+            with col2:
+                steps = st.number_input("Steps", min_value=2, max_value=100, value=5, key=f"sweep_steps_{name}")
+            sweeps[name] = np.linspace(values[name] * (1 - spread / 100), values[name] * (1 + spread / 100), steps)
 
+        if scenario_climates and scenario_landfills:
+            grid = evaluate_grid(
+                values, const,
+                [CLIMATE_OPTIONS[climate] for climate in scenario_climates],
+                [LANDFILL_OPTIONS[landfill] for landfill in scenario_landfills],
+                np.linspace(*coverage_range, coverage_steps), sweeps
+            )
+            grid['scenario'] = (grid['climate'].map(DISPLAY_MAP).astype(str) + ", "
+                                + grid['landfill_depth'].map(DISPLAY_MAP).astype(str))
+            st.caption(f"{len(grid):,} scenarios")
+
+            st.subheader("Total CO2 Saved [tCO2e] by climate and landfill depth")
+            st.dataframe(grid.groupby('scenario')['total_co2_saved'].describe()[['min', '50%', 'max']]
+                         .rename(columns={'50%': 'median'}).style.format("{:.0f}"))
+            st.line_chart(grid.groupby(['land_coverage', 'scenario'])['total_co2_saved'].median().unstack())
+            st.download_button("📥 Download scenarios (CSV)", grid.to_csv(index=False),
+                               file_name="scenarios.csv", mime="text/csv")
+
+
+@st.fragment
+@profiled
+def sensitivity_panel(values, const):
+    """Elasticities and one-at-a-time sweeps of a result."""
+    panel = lazy_expander("🌪️ Sensitivity", "sensitivity_panel")
+    if panel is None:
+        return
+    with panel:
+        st.write("Which inputs drive the results: each input is moved on its own by the chosen percentage, "
+                 "and its elasticity is the % change of the result for a 1% increase of the input.")
+        col1, col2 = st.columns(2)
+        with col1:
+            output = st.selectbox("Result", [TOTAL_CO2_OUTPUT] + list(KERNEL.outputs),
+                                  format_func=lambda output: KPI_LABELS[output][0])
+        with col2:
+            spread = st.slider("Change each input by (± %)", 1, 100, 10)
+
+        names = sensitivity_inputs(const)
+        sweep = one_at_a_time(values, names, spread / 100, output)
+        sweep['elasticity'] = pd.Series(elasticities(values, names, output), index=names)
+        sweep = sweep[sweep['high'] != sweep['low']]  # inputs the result does not depend on
+        if sweep.empty:
+            st.info("This result does not depend on any of the inputs.")
+            return
+
+        st.subheader(f"Change in {KPI_LABELS[output][0]} [{KPI_LABELS[output][1]}]")
+        tornado = pd.DataFrame({f"-{spread}%": sweep['low'] - sweep['base'],
+                                f"+{spread}%": sweep['high'] - sweep['base']})
+        st.bar_chart(tornado.rename(index=parameter_label), horizontal=True, sort=False, stack=True)
+        st.dataframe(sweep[['elasticity', 'low', 'base', 'high']].rename(index=parameter_label)
+                     .style.format({'elasticity': "{:.3f}", 'low': "{:.2f}", 'base': "{:.2f}", 'high': "{:.2f}"}))
 
-tab1, tab2 = st.tabs(["Data Input", "Calculations & Results"])
+
+@st.fragment
+@profiled
+def uncertainty_panel(values, const, factor_name):
+    """Monte Carlo uncertainty analysis."""
+    panel = lazy_expander("📊 Uncertainty (Monte Carlo)", "uncertainty_panel")
+    if panel is None:
+        return
+    with panel:
+        st.write("Sample the global parameters from their distributions and report percentiles of each result. "
+                 "Distributions come from the `distribution` and `spread` columns of the global parameters; "
+                 "the default below (none unless you choose one) applies to parameters without one.")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            n_samples = st.select_slider("Samples", options=[10_000, 100_000, 1_000_000], value=100_000)
+        with col2:
+            default_distribution = st.selectbox("Default distribution", ["none"] + list(DISTRIBUTIONS))
+        with col3:
+            default_spread = st.number_input("Default spread (%)", min_value=0.0, max_value=100.0, value=10.0, step=1.0)
+
+        if st.toggle("Run uncertainty analysis"):
+            distributions = input_distributions(
+                KERNEL, const, factor_name,
+                default=None if default_distribution == "none" else (default_distribution, default_spread / 100)
+            )
+            if not distributions:
+                st.info("No parameter has a distribution; choose a default distribution to vary them.")
+                return
+            summary = run_uncertainty_cached(values, distributions, n_samples)
+            numeric_columns = list(summary.columns)
+            summary.insert(0, 'units', [KPI_LABELS[output][1] for output in summary.index])
+            summary.index = [KPI_LABELS[output][0] for output in summary.index]
+            st.dataframe(summary.style.format("{:.2f}", subset=numeric_columns))
+
+
+# Only the selected tab runs; switching tabs reruns the page
+tab1, tab2 = st.tabs(TABS, key="tab", on_change="rerun")
 
 with tab1:   # Project data inputs
     col1, col2 = st.columns([2, 1])
     with col1:
         upload_option = st.radio(
             "Data input method:",
-            ["Pre-populated project data", "Upload CSV file"],
+            ["Pre-populated project data", "Upload CSV file", "Bulk upload", "Portfolio directory"],
             horizontal=True
         )
     with col2:
@@ -220,8 +474,55 @@ with tab1:   # Project data inputs
         # Pre-propulate climate conditions, landfill, and quarterly data from selected project
         project_names = list(projects.keys())
         selected_project = st.selectbox("Select Project", project_names)
-        project_climate = projects[selected_project]['climate']
-        project_landfill = projects[selected_project]['landfill_depth']
+        project = projects[selected_project]
+    elif upload_option == "Bulk upload":
+        uploads = st.file_uploader("Upload a ZIP archive of project CSV files, or several CSV files",
+                                   type=['csv', 'zip'], accept_multiple_files=True)
+        if not uploads:
+            st.info("Please upload project CSV files to continue")
+            st.stop()
+        bulk = bulk_upload(uploads)
+        if bulk.errors:
+            with st.expander(f"⚠️ {len(bulk.errors)} file(s) could not be read", expanded=True):
+                st.dataframe(pd.DataFrame({'file': list(bulk.errors), 'error': list(bulk.errors.values())}),
+                             hide_index=True)
+        if not bulk.projects:
+            st.stop()
+        with st.expander(f"Portfolio summary ({len(bulk.projects)} projects)", expanded=True):
+            with profiling.stage('portfolio summary'):
+                summary = portfolio_summary(bulk.projects, overlay.parameters)
+            st.dataframe(summary, hide_index=True)
+            st.download_button("📥 Download summary (CSV)", summary.to_csv(index=False),
+                               file_name="portfolio_summary.csv", mime="text/csv")
+            reports_download(lambda: bulk.projects.items(), overlay.parameters)
+        with st.expander("Elasticity of the total CO₂ saved per project"):
+            st.caption("% change of each project's total CO₂ saved for a 1% increase of each input")
+            st.dataframe(project_elasticities(bulk.projects, overlay.parameters)
+                         .rename(columns=parameter_label).style.format("{:.3f}"))
+        selected_project = st.selectbox("Select Project", list(bulk.projects))
+        project = bulk.projects[selected_project]
+    elif upload_option == "Portfolio directory":
+        portfolio_path = st.text_input("Portfolio directory", help="A directory written by `finish-kpis import`")
+        if not portfolio_path or not is_portfolio(portfolio_path):
+            st.info("Please enter the path of a portfolio directory to continue")
+            st.stop()
+        modified = os.path.getmtime(os.path.join(portfolio_path, 'portfolio.json'))
+        portfolio = open_portfolio(portfolio_path, modified)
+        if not len(portfolio):
+            st.info("The portfolio has no projects; import some with `finish-kpis import`")
+            st.stop()
+        selected_project = st.selectbox("Select Project", portfolio.names)
+        project = portfolio.project(selected_project)
+        with st.expander(f"Portfolio: CO₂ saved per year [tCO2e] ({len(portfolio)} projects)"):
+            by = st.radio("Group by", ["region", "climate", "landfill_depth"], horizontal=True,
+                          format_func=lambda column: column.replace('_', ' ').capitalize())
+            st.dataframe(portfolio_co2_cached(portfolio_path, modified, overlay.parameters, by).style.format("{:,.0f}"))
+            reports_download(lambda: ((name, portfolio.project(name)) for name in portfolio.names),
+                             overlay.parameters)
+        with st.expander("Portfolio: elasticity of the total CO₂ saved per project"):
+            st.caption("% change of each project's total CO₂ saved for a 1% increase of each input")
+            st.dataframe(portfolio_elasticities_cached(portfolio_path, modified, overlay.parameters)
+                         .rename(columns=parameter_label).style.format("{:.3f}"))
 
     # Quarterly Data Section
     st.subheader("Quarterly Data and Climate")
@@ -239,104 +540,86 @@ with tab1:   # Project data inputs
             )
         
         if uploaded_file is not None:
-            # Read and parse the uploaded CSV
-            content = uploaded_file.read().decode('utf-8')
-            project_data = parse_csv_file(content)        
-            project_climate = project_data['climate']
-            project_landfill = project_data['landfill_depth']
-            df = create_quarterly_dataframe(project_data, num_years, quarterly_cols)
+            # Stream and parse the uploaded CSV
+            selected_project = os.path.splitext(uploaded_file.name)[0]
+            lines = io.TextIOWrapper(uploaded_file, encoding='utf-8-sig', newline='')
+            try:
+                project = parse_csv_file(lines)
+            except ProjectFileError as e:
+                st.error(f"Could not read {uploaded_file.name}: {e}")
+                st.stop()
+            finally:
+                lines.detach()  # leave the uploaded file open for Streamlit
+            if project.num_years > num_years:
+                st.info(f"The file has {project.num_years} years of data; "
+                        "increase the number of years to include them.")
+            df = create_quarterly_dataframe(project, num_years, quarterly_cols)
         else:
             st.info("Please upload a CSV file to continue")
             st.stop()
     else:
         # Drop-down selected project data
-        project_data = projects[selected_project]
-        df = create_quarterly_dataframe(project_data, num_years, quarterly_cols)
+        df = create_quarterly_dataframe(project, num_years, quarterly_cols)
 
-    # Climate and Landfill Conditions (after data loading from csv or project list)
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        selected_climate = st.selectbox("Select Climate Condition", list(CLIMATE_OPTIONS.keys()),
-                                    index=list(CLIMATE_OPTIONS.keys()).index(DISPLAY_MAP[project_climate]))
-    with col2:
-        selected_landfill = st.selectbox("Select Landfill Depth", list(LANDFILL_OPTIONS.keys()),
-                                        index=list(LANDFILL_OPTIONS.keys()).index(DISPLAY_MAP[project_landfill]))
+    project_inputs(selected_project, project, df, quarterly_cols)
+    parameter_panel()
+    
+    st.divider()
+    st.button("View Results", type="primary", on_click=switch_tab, args=(1,))
 
-    with col3:
-        # Get conversion factor based on climate and landfill depth combination
-        climate_key = CLIMATE_OPTIONS[selected_climate]
-        landfill_key = LANDFILL_OPTIONS[selected_landfill]
-        landfill_conversion_factor = const[f"{climate_key}_{landfill_key}"]['value']
-        st.metric("Conversion Factor", f"{landfill_conversion_factor:.2f}")
+with tab2:
+    if tab2.open:
+        inputs = st.session_state.inputs
+        quarterly, quarterly_cols = inputs['quarterly'], inputs['quarterly_cols']
+        climate_key, landfill_key, land_coverage = inputs['climate_key'], inputs['landfill_key'], inputs['land_coverage']
+        with profiling.stage('sums'):
+            sums = {f'total_{category}': float(total) for category, total in zip(DATA_CATEGORIES, quarterly.sum(axis=1))}
+        const = st.session_state.parameters.parameters
+        landfill_conversion_factor = const.value(f"{climate_key}_{landfill_key}")
 
-    # Land Coverage Input
-    land_coverage = st.number_input(
-        "Land Coverage (acres)",
-        min_value=0.0, value=float(project_data['land_coverage']), step=5.0, format="%.0f"
-    )
+        # Calculate results for parts a - i, recomputing only sections whose inputs changed
+        if 'evaluator' not in st.session_state:
+            st.session_state.evaluator = Evaluator(store=open_result_store())
+        evaluator = st.session_state.evaluator
+        values = parameter_values(sums, const, landfill_conversion_factor, land_coverage)
+        with profiling.stage('evaluate'):
+            results = evaluator.evaluate(values, project_key(quarterly, land_coverage, climate_key, landfill_key, const))
 
-    # Display editable table
-    column_config = {
-        col: st.column_config.NumberColumn(col, min_value=0.0, step=0.1)
-        for col in get_quarterly_colnames(num_years)
-    } 
-    st.write("Edit the values below:")
-    edited_df = st.data_editor(df, column_config=column_config)
+        # Display results for parts a - i
+        for calc_key in ['a', 'b', 'c', 'e', 'f', 'g', 'h', 'i']:
+            display_section(calc_key, results[calc_key], st)
+            st.divider()
 
-    # Extract values from edited DataFrame
-    sums = {
-        f'total_{category}': sum(
-            (lambda x: 0 if pd.isna(x) else x)(
-                pd.to_numeric(edited_df.loc[category_name][col], errors='coerce')
-            )
-            for col in quarterly_cols
-        )
-        for category, category_name in DATA_CATEGORIES.items()
-    }
+        # Summary
+        st.header("Summary")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Total CO2 Saved", f"{total_co2_saved(results):.0f} tCO2e")
+            st.metric("Total Compost Generated", f"{sums['total_compost']:.0f} t")
+        with col2:
+            st.metric("Total Energy Saved", f"{results['f']['total_energy_saved']:.0f} kWh")
+            st.metric("Total NPK Recovery", f"{results['e']['total_npk_recovery']:.2f} t")
 
-    # Collapsible constants section
-    with st.expander("🔧 Adjust Parameters", expanded=False):
-        st.write("Modify calculation parameters below. Changes will be applied to all calculations.")
-        
-        # Group constants by section (excluding Conversions)
-        sections = sorted({data['section'] for data in const.values() if data['section'] != 'Conversions'})
-        for section in sections:
-            st.subheader(f"Part {section} Parameters")
-            section_constants = [(name, data) for name, data in const.items() if data['section'] == section]
-            cols = st.columns(3)
-            
-            for i, (name, data) in enumerate(section_constants):
-                with cols[i % 3]:
-                    const[name]['value'] = st.number_input(
-                        f"{name.replace('_', ' ').title()}",
-                        value=data['value'],
-                        help=f"{data['units']} - Source: {data['source']}",
-                        key=f"const_{name}"
-                    )
-    
-    st.divider()
-    if st.button("View Results", type="primary"):
-        switch_tab(1)
+        if evaluator.from_store:
+            st.caption("Results served from the result store")
+        else:
+            st.caption(f"{len(evaluator.recomputed)} sections recomputed, {len(evaluator.cached)} served from cache")
 
-with tab2:
-    # Calculate and display results for parts a - i
-    results = {}
-    for calc_key in ['a', 'b', 'c', 'e', 'f', 'g', 'h', 'i']:
-        results[calc_key] = calculate_and_display(calc_key, sums, const, landfill_conversion_factor, land_coverage, st)
-        st.divider()
-
-    # Summary
-    st.header("Summary")
-    col1, col2 = st.columns(2)
-    co2_sections = [key for key in results.keys() 
-                    if 'co2_saved_[t]' in results[key]]
-    total_co2_saved = sum(results[section]['co2_saved_[t]'] for section in co2_sections)
-    with col1:
-        st.metric("Total CO2 Saved", f"{total_co2_saved:.0f} tCO2e")
-        st.metric("Total Compost Generated", f"{sums['total_compost']:.0f} t")
-    with col2:
-        st.metric("Total Energy Saved", f"{results['f']['total_energy_saved']:.0f} kWh")
-        st.metric("Total NPK Recovery", f"{results['e']['total_npk_recovery']:.2f} t")
-    
-    if st.button("← Back to Data Input", type="secondary"):
-        switch_tab(0)
+        # Analyses; interacting with one reruns only that panel
+        trends_panel(quarterly, quarterly_cols, const, landfill_conversion_factor, land_coverage)
+        scenarios_panel(values, const, land_coverage)
+        sensitivity_panel(values, const)
+        uncertainty_panel(values, const, f"{climate_key}_{landfill_key}")
+
+        # The report is only rendered when the button is clicked
+        report_project = ProjectRecord(climate_key, landfill_key, land_coverage, quarterly)
+        st.download_button("📥 Download report (Markdown)",
+                           lambda: project_report(inputs['name'], report_project, const),
+                           file_name=f"{inputs['name']}.md", mime="text/markdown")
+
+        st.button("← Back to Data Input", type="secondary", on_click=switch_tab, args=(0,))
+
+# Timing breakdown (with profiling on); reruns stopped early for missing inputs are not reported
+run = profiling.finish_run()
+if run is not None:
+    profile_panel(run)
@@ -0,0 +1,85 @@
+"""
+Images shipped in finish_mondial_kpis/images/, prepared for display.
+
+Each image is read from the installed package, downscaled to the size it is shown at and
+encoded as a data URI once per process, so the app neither downloads nor re-encodes images
+on reruns and the browser needs no extra requests for them.
+"""
+import base64
+import io
+from functools import lru_cache
+from importlib import resources
+
+# Images are prepared at twice their display size to stay sharp on high-density screens
+DENSITY = 2
+ICON_WIDTH = 50
+LOGO_WIDTH = 200
+BANNER_HEIGHT = 150
+BANNER_ASPECT = 8  # width / height of the banner strip on the wide page layout
+
+LOGO = 'logo_finish-wit-retina.png'
+BANNER = 'hqdefault.jpg'
+
+
+def _read(filename):
+    return resources.files('finish_mondial_kpis').joinpath('images').joinpath(filename).read_bytes()
+
+
+def _open(filename):
+    from PIL import Image
+
+    return Image.open(io.BytesIO(_read(filename)))
+
+
+def _encode(data, image_format):
+    return f"data:image/{image_format.lower()};base64,{base64.b64encode(data).decode()}"
+
+
+def _data_uri(image, image_format):
+    buffer = io.BytesIO()
+    if image_format == 'JPEG':
+        image.convert('RGB').save(buffer, 'JPEG', quality=85, optimize=True, progressive=True)
+    else:
+        image.save(buffer, 'PNG', optimize=True)
+    return _encode(buffer.getvalue(), image_format)
+
+
+@lru_cache(maxsize=None)
+def image_uri(filename, width):
+    """Data URI of a packaged image scaled for display `width` pixels wide (never enlarged)."""
+    from PIL import Image
+
+    image = _open(filename)
+    width = width * DENSITY
+    if width >= image.width:
+        return _encode(_read(filename), image.format)  # already small enough; keep the original file
+    resized = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+    return _data_uri(resized, image.format)
+
+
+def icon_uri(filename):
+    """Data URI of a section icon."""
+    return image_uri(filename, ICON_WIDTH)
+
+
+def logo_uri():
+    return image_uri(LOGO, LOGO_WIDTH)
+
+
+@lru_cache(maxsize=None)
+def banner_uri():
+    """Data URI of the banner, cropped to the strip shown behind the title.
+
+    The banner fills the page width at BANNER_HEIGHT pixels high (object-fit: cover), so only a
+    central strip of the image is ever visible.
+    """
+    from PIL import Image
+
+    image = _open(BANNER)
+    height = min(image.height, round(image.width / BANNER_ASPECT))
+    top = (image.height - height) // 2
+    strip = image.crop((0, top, image.width, top + height))
+    if strip.height > BANNER_HEIGHT * DENSITY:
+        strip = strip.resize((round(strip.width * BANNER_HEIGHT * DENSITY / strip.height), BANNER_HEIGHT * DENSITY),
+                             Image.LANCZOS)
+    return _data_uri(strip, 'JPEG')
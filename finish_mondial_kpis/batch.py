@@ -0,0 +1,165 @@
+"""
+Headless evaluation of many project CSV files across a process pool.
+Results are streamed to CSV or Parquet as each project finishes, so a portfolio
+never has to be held in memory at once.
+"""
+import csv
+import glob
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .calculations import calculate, output_name, total_co2_saved, TOTAL_CO2_OUTPUT
+from .projects import parse_csv_file
+from .store import ResultStore, project_key
+
+BatchSummary = namedtuple('BatchSummary', ['evaluated', 'cached', 'failed', 'elapsed'])
+
+# Constants and result store shared by every task in a worker process (set by _init_worker)
+_const = None
+_store = None
+
+
+def find_project_files(paths):
+    """Expand directories and glob patterns into a sorted list of CSV files."""
+    files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            files.update(glob.glob(os.path.join(path, '*.csv')))
+        else:
+            files.update(glob.glob(path, recursive=True))
+    return sorted(files)
+
+
+def evaluate_project(path, const, store=None):
+    """Parse one project file and evaluate every section (or look them up in `store`), returned as a flat row."""
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        project = parse_csv_file(f)
+    return project_row(os.path.splitext(os.path.basename(path))[0], project, const, store)
+
+
+def project_row(name, project, const, store=None):
+    """Evaluate a ProjectRecord as a flat row: settings, category totals, every result and the total CO2 saved."""
+    sums = project.sums()
+
+    def evaluate():
+        return calculate(sums, const, const.value(project.conversion_factor_name), project.land_coverage)
+
+    if store is None:
+        results = evaluate()
+    else:
+        key = project_key(project.quarterly, project.land_coverage, project.climate, project.landfill_depth, const)
+        results = store.get_or_calculate(key, evaluate)
+
+    row = {
+        'project': name,
+        'climate': project.climate.value,
+        'landfill_depth': project.landfill_depth.value,
+        'land_coverage': project.land_coverage,
+        **sums,
+    }
+    for calc_key, result in results.items():
+        for key, value in result.items():
+            row[output_name((calc_key, key))] = value
+    row[output_name(TOTAL_CO2_OUTPUT)] = total_co2_saved(results)
+    return row
+
+
+def _init_worker(const, store_path):
+    global _const, _store
+    _const = const
+    _store = ResultStore(store_path) if store_path else None
+
+
+def _evaluate_in_worker(path):
+    """Returns (row, whether it came from the result store)."""
+    hits = _store.hits if _store else 0
+    row = evaluate_project(path, _const, _store)
+    return row, bool(_store and _store.hits > hits)
+
+
+class CSVResultWriter:
+    """Write result rows to a CSV file, flushing each row as it arrives."""
+    def __init__(self, path):
+        self._file = sys.stdout if path == '-' else open(path, 'w', newline='', encoding='utf-8')
+        self._writer = None
+
+    def write(self, row):
+        if self._writer is None:
+            self._writer = csv.DictWriter(self._file, fieldnames=list(row))
+            self._writer.writeheader()
+        self._writer.writerow(row)
+        self._file.flush()
+
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+class ParquetResultWriter:
+    """Write result rows to a Parquet file in row groups of `batch_size` rows."""
+    def __init__(self, path, batch_size=1000):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("Parquet output requires pyarrow: pip install 'finish-mondial-kpis[parquet]'")
+        self.path = path
+        self.batch_size = batch_size
+        self._rows = []
+        self._writer = None
+
+    def write(self, row):
+        self._rows.append(row)
+        if len(self._rows) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if not self._rows:
+            return
+        table = pa.Table.from_pylist(self._rows)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table)
+        self._rows = []
+
+    def close(self):
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+
+
+def open_result_writer(path):
+    """Pick a result writer from the output file extension."""
+    if path.endswith('.parquet'):
+        return ParquetResultWriter(path)
+    return CSVResultWriter(path)
+
+
+def run_batch(files, const, writer, workers=None, on_error=None, store_path=None):
+    """Evaluate `files` in a process pool, writing each row as soon as it is ready.
+
+    With a `store_path`, unchanged projects are served from that ResultStore. Returns a BatchSummary
+    of the number of projects evaluated (cached ones included), cached and failed, and the seconds taken.
+    """
+    start = time.perf_counter()
+    evaluated = cached = failed = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(const, store_path)) as executor:
+        futures = {executor.submit(_evaluate_in_worker, path): path for path in files}
+        for future in as_completed(futures):
+            path = futures.pop(future)  # drop the reference so finished rows can be freed
+            try:
+                row, hit = future.result()
+            except Exception as e:
+                failed += 1
+                if on_error is not None:
+                    on_error(path, e)
+                continue
+            writer.write(row)
+            evaluated += 1
+            cached += hit
+    return BatchSummary(evaluated, cached, failed, time.perf_counter() - start)
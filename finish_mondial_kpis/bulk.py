@@ -0,0 +1,104 @@
+"""
+Bulk upload of many project CSVs at once, as ZIP archives and/or several CSV files.
+
+Each file is decoded straight from its upload (or its archive member) as a text stream, so
+only the files being parsed are ever decompressed at once, and files are parsed in a bounded
+thread pool. A file that fails to parse is reported with its error; the others still load.
+"""
+import io
+import os
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+
+import pandas as pd
+
+from .batch import project_row
+from .profiling import timed
+from .projects import parse_csv_file
+
+# Larger members are rejected unread (a project CSV of 1000 years is about 100 kB)
+MAX_FILE_SIZE = 50 * 1024 * 1024
+
+BulkUpload = namedtuple('BulkUpload', ['projects', 'errors'])  # {name: ProjectRecord}, {file: message}
+
+
+def _sources(upload, errors):
+    """(name, file, open) for every CSV in one upload, where open() returns a binary stream to use in a `with`."""
+    filename = getattr(upload, 'name', 'upload')
+    if not zipfile.is_zipfile(upload):
+        upload.seek(0)
+        yield os.path.splitext(os.path.basename(filename))[0], filename, lambda: nullcontext(upload)  # left open
+        return
+    upload.seek(0)
+    archive = zipfile.ZipFile(upload)  # members share the upload; zipfile serialises their reads
+    for info in archive.infolist():
+        path = f"{filename}/{info.filename}"
+        base = os.path.basename(info.filename)
+        if info.is_dir() or not base.lower().endswith('.csv') or base.startswith('.') \
+                or info.filename.startswith('__MACOSX/'):
+            continue
+        if info.file_size > MAX_FILE_SIZE:
+            errors[path] = f"larger than {MAX_FILE_SIZE // 2 ** 20} MB"
+            continue
+        yield os.path.splitext(base)[0], path, lambda info=info: archive.open(info)
+
+
+def _parse(open_file):
+    with open_file() as binary:
+        lines = io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+        try:
+            return parse_csv_file(lines)
+        finally:
+            lines.detach()  # closing is left to the `with`
+
+
+@timed('parse uploads')
+def parse_uploads(uploads, max_workers=4, on_progress=None):
+    """Parse every project CSV in `uploads` (binary files with a `name`, CSVs or ZIP archives of them).
+
+    Files are parsed by up to `max_workers` threads; `on_progress(done, total, file)` is called
+    from this thread as each one finishes. Returns a BulkUpload of the parsed projects by name
+    (the file name without .csv) and the errors by file, both sorted.
+    """
+    errors = {}
+    sources = []
+    for upload in uploads:
+        try:
+            sources.extend(_sources(upload, errors))
+        except (zipfile.BadZipFile, OSError) as e:
+            errors[getattr(upload, 'name', 'upload')] = f"could not read the archive: {e}"
+    parsed = [None] * len(sources)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_parse, open_file): i for i, (_, _, open_file) in enumerate(sources)}
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures.pop(future)
+            try:
+                parsed[i] = future.result()
+            except Exception as e:  # a malformed file is reported in its place, whatever it raises
+                errors[sources[i][1]] = str(e)
+            if on_progress is not None:
+                on_progress(done, len(sources), sources[i][1])
+
+    # Duplicate names are resolved in upload order, whichever file finished first
+    projects, files = {}, {}
+    for (name, path, _), project in zip(sources, parsed):
+        if project is None:
+            continue
+        if name in projects:
+            errors[path] = f"duplicate project name '{name}' (also in {files[name]})"
+        else:
+            projects[name] = project
+            files[name] = path
+    return BulkUpload(dict(sorted(projects.items())), dict(sorted(errors.items())))
+
+
+def portfolio_summary(projects, const):
+    """One row of results per project plus a 'Total' row summing every numeric column."""
+    summary = pd.DataFrame([project_row(name, project, const) for name, project in projects.items()])
+    if summary.empty:
+        return summary
+    totals = summary.sum(numeric_only=True)
+    totals['project'] = 'Total'
+    return pd.concat([summary, totals.to_frame().T], ignore_index=True)
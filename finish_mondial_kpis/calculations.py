@@ -1,178 +1,143 @@
 """
-Consolidated calculation definitions that automatically generate both LaTeX equations and Python calculations.
-This ensures perfect consistency by defining each calculation only once.
-Also includes mapping dictionaries, display configurations, and data loading functions.
+Runtime side of the calculation definitions in expressions.py.
+Evaluates them with the compiled kernel and serves the prerendered LaTeX from the equations
+artifact, so neither this module nor the app imports sympy.
+Also includes display configurations and data loading functions.
 """
-from sympy import latex, Symbol
+import numpy as np
 import pandas as pd
-import os
-
-class CustomSymbol(Symbol):
-    """Custom Symbol class with LaTeX name support."""
-    def __new__(cls, name, latex_name=None):
-        obj = Symbol.__new__(cls, name)
-        obj._latex_name = latex_name or name
-        return obj
-    
-    def _latex(self, printer):
-        return self._latex_name
-
-def load_symbols_from_csv(url):
-    df = pd.read_csv(url)
-    return {
-        row['name']: CustomSymbol(row['name'], row['latex_name']) 
-        for _, row in df.iterrows()
-    }
-
-# Load data from GitHub repository
-base_url = "https://raw.githubusercontent.com/dalyw/finish-mondial-kpis/refs/heads/main/finish_mondial_kpis/"
-data_symbols = load_symbols_from_csv(f"{base_url}data/project_parameters.csv")
-constant_symbols = load_symbols_from_csv(f"{base_url}data/global_parameters.csv")
-
-# # Uncomment to load data from local files (temporarily for testing)
-# data_symbols = load_symbols_from_csv("data/project_parameters.csv")
-# constant_symbols = load_symbols_from_csv("data/global_parameters.csv")
-sym = {**data_symbols, **constant_symbols}
-sym['landfill_conversion_factor'] = CustomSymbol('landfill_conversion_factor', r'\text{Conversion Factor}')
-
-
-CALCULATION_EXPRESSIONS = {
-    'a': {
-        'title': 'Part A: Carbon Emissions Saved Through Compost Production',
-        'icon': 'circular-recycle.png',
-        'equations': {
-            'CO2 Saved [t]': {
-                'expression': sym['total_compost'] * sym['landfill_conversion_factor'] * sym['co2_c_ratio'],
-                'units': 'tCO2',
-                'decimals': 0
-            }
-        }
-    },
-    
-    'b': {
-        'title': 'Part B: Fertilizer Replacement with Compost',
-        'icon': 'circular-tractor.png',
-        'equations': {
-            'CO2 Saved [t]': {
-                'expression': sym['n_production_emissions'] * sym['total_cocompost'] * 
-                           (sym['n_content_compost'] + sym['p_content_compost'] + sym['k_content_compost']) / sym['kg_per_ton'],
-                'units': 'tCO2',
-                'decimals': 0
-            }
-        }
-    },
-    
-    'c': {
-        'title': 'Part C: Faecal Sludge Treatment',
-        'icon': 'circular-man-bricks.png',
-        'equations': {
-            'CO2 Saved [t]': {
-                'expression': sym['total_fs'] * sym['fs_conversion_factor'],
-                'units': 'tCO2',
-                'decimals': 0
-            }
-        }
-    },
-    'e': {
-        'title': 'Part E: Nutrients (NPK) Recovery',
-        'icon': 'circular-tractor.png',
-        'equations': {
-            'Total NPK Recovery': {
-                'expression': sym['total_cocompost'] * (sym['n_recovery_content'] + 
-                            sym['p2o5_recovery_content'] + sym['k2o_recovery_content']) / sym['kg_per_ton'],
-                'units': 't',
-                'decimals': 2
-            }
-        }
-    },
-    
-    'f': {
-        'title': 'Part F: Energy Saving Through Reduced Irrigation',
-        'icon': 'circular-recycle.png',
-        'equations': {
-            'Total Energy Saved': {
-                'expression': sym['land_coverage'] * sym['energy_per_liter_diesel'] * 
-                           sym['diesel_per_acre'] * sym['water_reduction_percent'],
-                'units': 'kWh',
-                'decimals': 0
-            }
-        }
-    },
-    
-    'g': {
-        'title': 'Part G: CO2 Savings from Diesel Reduction',
-        'icon': 'circular-truck.png',
-        'equations': {
-            'CO2 Saved [t]': {
-                'expression': (sym['land_coverage'] * sym['co2_per_liter_diesel'] * 
-                            sym['diesel_per_acre'] * sym['water_reduction_percent']) / sym['kg_per_ton'],
-                'units': 'tCO2',
-                'decimals': 0
-            }
-        }
-    },
-    
-    'h': {
-        'title': 'Part H: Plastic Burning Avoidance',
-        'icon': 'circular-recycle.png',
-        'equations': {
-            'CO2 Saved [t]': {
-                'expression': sym['total_recycle'] * sym['plastic_emission_factor'],
-                'units': 'tCO2',
-                'decimals': 0
-            }
-        }
-    },
-    
-    'i': {
-        'title': 'Part I: Plastic Recycling',
-        'icon': 'circular-recycle.png',
-        'equations': {
-            'CO2 Saved [t]': {
-                'expression': sym['total_recycle'] * (sym['new_plastic_emissions'] - sym['recycling_emissions']),
-                'units': 'tCO2',
-                'decimals': 0
-            }
-        }
-    }
+from collections import namedtuple
+
+from .assets import ICON_WIDTH, icon_uri
+from .equations import load_equations
+from .mappings import DATA_CATEGORIES
+from .parameters import ParameterSet
+from .profiling import stage, timed
+from .sources import get_data_source
+
+
+@timed('load_constants')
+def load_constants(csv_file=None):
+    """Load constants from CSV (the configured data source by default) as an immutable ParameterSet."""
+    if csv_file is None:
+        csv_file = data_source.open("data/global_parameters.csv")
+    return ParameterSet.from_dataframe(pd.read_csv(csv_file))
+
+
+# Load data from the configured source (packaged files unless FINISH_KPIS_DATA_SOURCE says otherwise)
+data_source = get_data_source()
+EQUATIONS = load_equations()
+SECTIONS = EQUATIONS.sections
+KERNEL = EQUATIONS.kernel
+CO2_SAVED_KEY = 'co2_saved_[t]'
+# Kernel output rows of the CO2 saved by each section, summed for the total CO2 saved
+CO2_ROWS = [i for i, (_, key) in enumerate(KERNEL.outputs) if key == CO2_SAVED_KEY]
+TOTAL_CO2_OUTPUT = ('summary', 'total_co2_saved')
+
+# Display name and units of every result, keyed by (calc_key, result key)
+KPI_LABELS = {
+    (calc_key, equation['key']): (f"{calc['title'].split(':')[0]}: {label}", equation['units'])
+    for calc_key, calc in SECTIONS.items() for label, equation in calc['equations'].items()
 }
+KPI_LABELS[TOTAL_CO2_OUTPUT] = ("Total CO2 Saved", "tCO2e")
+
+
+def output_name(output):
+    """Flat column name of a (calc_key, result key) output, e.g. 'a_co2_saved_[t]'."""
+    return output[1] if output == TOTAL_CO2_OUTPUT else f"{output[0]}_{output[1]}"
+
+
+KPISeries = namedtuple('KPISeries', ['quarterly', 'yearly', 'cumulative'])
+
+
+def __getattr__(name):
+    # The symbolic definitions (and sympy) are only imported when asked for
+    if name in ('CALCULATION_EXPRESSIONS', 'sym', 'CustomSymbol', 'load_symbols_from_csv'):
+        from . import expressions
+        return getattr(expressions, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def parameter_values(sums, const, landfill_conversion_factor, land_coverage):
+    """Collect the numeric value of every calculation symbol."""
+    return {key: (landfill_conversion_factor if key == 'landfill_conversion_factor' else
+                  land_coverage if key == 'land_coverage' else
+                  sums[key] if key in sums else const.value(key))
+            for key in KERNEL.inputs}
 
 
+def project_values(projects, const):
+    """parameter_values for a list of ProjectRecords, as arrays with one element per project."""
+    totals = np.array([project.quarterly.sum(axis=1) for project in projects]).reshape(len(projects), -1).T
+    return parameter_values(
+        {f'total_{category}': totals[i] for i, category in enumerate(DATA_CATEGORIES)}, const,
+        np.array([const.value(project.conversion_factor_name) for project in projects]),
+        np.array([project.land_coverage for project in projects]),
+    )
+
+
+def calculate(sums, const, landfill_conversion_factor, land_coverage):
+    """Evaluate every section, returned as {calc_key: {result key: value}}."""
+    outputs = KERNEL.evaluate(parameter_values(sums, const, landfill_conversion_factor, land_coverage))
+    results = {calc_key: {} for calc_key in SECTIONS}
+    for (calc_key, key), value in outputs.items():
+        results[calc_key][key] = value
+    return results
+
+
+@timed('calculate_series')
+def calculate_series(quarterly, quarterly_cols, const, landfill_conversion_factor, land_coverage):
+    """Evaluate every section for each quarter in one vectorized pass.
+
+    `quarterly` is the (category x quarter) data array with columns named by `quarterly_cols`.
+    Project-level quantities (land coverage) are spread evenly over the quarters, so each series
+    adds up to the project totals. Returns a KPISeries of per-quarter, per-year and cumulative
+    DataFrames with one column per result plus the total CO2 saved.
+    """
+    sums = {f'total_{category}': row for category, row in zip(DATA_CATEGORIES, quarterly)}
+    values = parameter_values(sums, const, landfill_conversion_factor, land_coverage / len(quarterly_cols))
+    outputs = KERNEL([values[name] for name in KERNEL.inputs]).reshape(len(KERNEL.outputs), -1)
+    columns = pd.Index(list(KERNEL.outputs), tupleize_cols=False)
+    per_quarter = pd.DataFrame(
+        np.broadcast_to(outputs, (len(KERNEL.outputs), len(quarterly_cols))).T, index=quarterly_cols, columns=columns
+    )
+    per_quarter[TOTAL_CO2_OUTPUT] = per_quarter[[KERNEL.outputs[i] for i in CO2_ROWS]].sum(axis=1)
+
+    per_year = per_quarter.groupby([col.split('Q')[0] for col in quarterly_cols], sort=False).sum()
+    return KPISeries(per_quarter, per_year, per_quarter.cumsum())
+
+
+def total_co2_saved(results):
+    """Sum the CO2 saved across all sections that report it."""
+    return sum(result[CO2_SAVED_KEY] for result in results.values() if CO2_SAVED_KEY in result)
+
+
+@timed('generate_latex')
 def generate_latex(calc_key):
-    """Generate LaTeX equation from symbolic expression."""
-    calc = CALCULATION_EXPRESSIONS[calc_key]
-    equations = []
-    mul_symbol = r' \times '
-    for label, expr_data in calc['equations'].items():
-        equation = expr_data['expression']
-        equations.append(f"\\text{{{label}}} = {latex(equation, mul_symbol=mul_symbol)}")
-    return "\\begin{align}\n" + " \\\\\n".join(equations) + "\n\\end{align}"
+    """Return the prerendered LaTeX equations for a section."""
+    return SECTIONS[calc_key]['latex']
+
+
+def display_section(calc_key, result, st):
+    """Display a section's icon, title, result values and LaTeX equations."""
+    calc = SECTIONS[calc_key]
+    with stage(f'render {calc_key}'):
+        col1, col2, col3 = st.columns([1, 12, 8])
+        with col1:
+            st.image(icon_uri(calc['icon']), width=ICON_WIDTH)
+        with col2:
+            st.subheader(calc['title'])
+        with col3:
+            for label, equation in calc['equations'].items():
+                value = f"{result[equation['key']]:.{equation['decimals']}f} {equation['units']}"
+                st.metric(label, value)
+
+        # Display LaTeX equations
+        st.latex(generate_latex(calc_key))
 
 
 def calculate_and_display(calc_key, sums, const, landfill_conversion_factor, land_coverage, st):
     """Calculate and display results for a given calculation."""
-    calc = CALCULATION_EXPRESSIONS[calc_key]
-    result = {}
-    # create substitution dict for symbol evalution
-    subs = {sym[key]: (landfill_conversion_factor if key == 'landfill_conversion_factor' else 
-                    land_coverage if key == 'land_coverage' else
-                    sums[key] if key in sums else const[key]['value'])
-        for key in sym}
-        
-    # Display icon, section title, and values
-    col1, col2, col3 = st.columns([1, 12, 8])
-    with col1:
-        st.image(f"{base_url}images/{calc['icon']}", width=50)
-    with col2:
-        st.subheader(calc['title'])
-    with col3:  
-        for label, expr_data in calc['equations'].items():
-            key = label.lower().replace(' ', '_')
-            result[key] = float(expr_data['expression'].subs(subs))
-            value = f"{result[key]:.{expr_data['decimals']}f} {expr_data['units']}"
-            st.metric(label, value)
-    
-    # Display LaTeX equations
-    st.latex(generate_latex(calc_key))
-    
-    return result
\ No newline at end of file
+    result = calculate(sums, const, landfill_conversion_factor, land_coverage)[calc_key]
+    display_section(calc_key, result, st)
+    return result
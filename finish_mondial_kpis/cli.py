@@ -0,0 +1,208 @@
+"""
+Command line entry point (`finish-kpis`) for running the KPI calculations without Streamlit.
+"""
+import argparse
+import csv
+import itertools
+import os
+import sys
+import time
+
+from .batch import find_project_files, open_result_writer, run_batch
+from .calculations import load_constants
+from .equations import artifact_path, load_equations
+from .portfolio import Portfolio, import_projects, is_portfolio
+from .profiling import run
+from .reports import WORKBOOK_NAME, WorkbookWriter, render_reports, write_reports
+from .store import STORE_FILENAME
+from .sources import default_cache_dir
+
+
+def batch(args):
+    """Evaluate a portfolio of project CSVs and stream the results to a file."""
+    portfolios = [Portfolio(path) for path in args.paths if is_portfolio(path)]
+    files = find_project_files([path for path in args.paths if not is_portfolio(path)])
+    if not files and not portfolios:
+        print("No project CSV files found", file=sys.stderr)
+        return 1
+    const = load_constants(args.parameters)
+    workers = min(args.workers or os.cpu_count(), max(len(files), 1))
+
+    def report_error(path, error):
+        print(f"{path}: {error}", file=sys.stderr)
+
+    store_path = None if args.no_store else args.store or os.path.join(default_cache_dir(), STORE_FILENAME)
+    writer = open_result_writer(args.output)
+    try:
+        # Portfolios are evaluated in vectorised chunks in this process; the result store is not needed for them
+        start = time.perf_counter()
+        for portfolio in portfolios:
+            for results in portfolio.iter_results(const):
+                for row in results.to_dict('records'):
+                    writer.write(row)
+            print(f"Evaluated {len(portfolio)} projects from portfolio {portfolio.path} "
+                  f"in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+            start = time.perf_counter()
+        if not files:
+            return 0
+        summary = run_batch(files, const, writer, workers=workers, on_error=report_error, store_path=store_path)
+    finally:
+        writer.close()
+    print(f"Evaluated {summary.evaluated} projects ({summary.cached} from the result store, {summary.failed} failed) "
+          f"in {summary.elapsed:.2f}s ({summary.evaluated / summary.elapsed:.1f} projects/s, "
+          f"{workers} worker processes)", file=sys.stderr)
+    return 1 if summary.failed else 0
+
+
+def report(args):
+    """Write a Markdown report of every project and a portfolio workbook."""
+    portfolios = [Portfolio(path) for path in args.paths if is_portfolio(path)]
+    files = find_project_files([path for path in args.paths if not is_portfolio(path)])
+    if not files and not portfolios:
+        print("No project CSV files found", file=sys.stderr)
+        return 1
+    const = load_constants(args.parameters)
+    os.makedirs(args.output, exist_ok=True)
+    workbook = None
+    if not args.no_workbook:
+        try:
+            workbook = WorkbookWriter(args.workbook or os.path.join(args.output, WORKBOOK_NAME), const)
+        except ImportError as e:
+            print(f"{e} (or use --no-workbook)", file=sys.stderr)
+            return 1
+    failed = []
+
+    def report_error(path, error):
+        failed.append(path)
+        print(f"{path}: {error}", file=sys.stderr)
+
+    def save(filename, text):
+        with open(os.path.join(args.output, filename), 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    # Portfolio projects are read from the memory-mapped data as they are needed
+    items = itertools.chain(files, ((name, portfolio.project(name)) for portfolio in portfolios
+                                    for name in portfolio.names))
+    start = time.perf_counter()
+    written = write_reports(render_reports(items, const, workers=args.workers, on_error=report_error), save, workbook,
+                            report_error)
+    print(f"Wrote {written} reports ({len(failed)} failed) to {args.output} "
+          f"in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def import_(args):
+    """Import project CSVs into a columnar portfolio directory."""
+    files = find_project_files(args.paths)
+    if not files:
+        print("No project CSV files found", file=sys.stderr)
+        return 1
+    regions = {}
+    if args.regions:
+        with open(args.regions, encoding='utf-8-sig', newline='') as f:
+            regions = {row['name']: row['region'] for row in csv.DictReader(f)}
+    failed = []
+
+    def report_error(path, error):
+        failed.append(path)
+        print(f"{path}: {error}", file=sys.stderr)
+
+    start = time.perf_counter()
+    portfolio = import_projects(files, args.output, regions=regions, on_error=report_error)
+    print(f"Imported {len(portfolio)} projects ({len(failed)} failed) into {args.output} "
+          f"in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def co2(args):
+    """Total CO2 saved per year of a portfolio, grouped by region, climate or landfill depth."""
+    if not is_portfolio(args.portfolio):
+        print(f"{args.portfolio} is not a portfolio directory (see `finish-kpis import`)", file=sys.stderr)
+        return 1
+    portfolio = Portfolio(args.portfolio)
+    portfolio.co2_by_year(load_constants(args.parameters), by=args.by).to_csv(sys.stdout)
+    return 0
+
+
+def build(args):
+    """Rebuild the prerendered equations artifact used at startup."""
+    equations = load_equations(rebuild=True)
+    print(artifact_path(equations.key))
+    return 0
+
+
+def serve(args):
+    """Serve the KPI calculations as a local JSON HTTP service."""
+    try:
+        import uvicorn
+        from .service import create_app
+    except ImportError as e:
+        print(e, file=sys.stderr)
+        return 1
+    uvicorn.run(create_app(load_constants(args.parameters)), host=args.host, port=args.port, workers=1)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='finish-kpis', description=__doc__.strip())
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    batch_parser = subparsers.add_parser('batch', help=batch.__doc__)
+    batch_parser.add_argument('paths', nargs='+',
+                              help="Project CSV files, directories, glob patterns or portfolio directories")
+    batch_parser.add_argument('-o', '--output', default='-',
+                              help="Output file (.csv or .parquet); defaults to CSV on stdout")
+    batch_parser.add_argument('-w', '--workers', type=int, default=None,
+                              help="Number of worker processes (default: number of CPUs)")
+    batch_parser.add_argument('--parameters', default=None,
+                              help="Global parameters CSV (default: from the configured data source)")
+    batch_parser.add_argument('--store', default=None,
+                              help="Result store file (default: results.sqlite3 in the cache directory)")
+    batch_parser.add_argument('--no-store', action='store_true',
+                              help="Evaluate every project instead of reusing stored results")
+    batch_parser.set_defaults(func=batch)
+
+    report_parser = subparsers.add_parser('report', help=report.__doc__)
+    report_parser.add_argument('paths', nargs='+',
+                               help="Project CSV files, directories, glob patterns or portfolio directories")
+    report_parser.add_argument('-o', '--output', required=True, help="Directory to write the reports to")
+    report_parser.add_argument('--workbook', default=None,
+                               help=f"Portfolio workbook to write (default: {WORKBOOK_NAME} in the output directory)")
+    report_parser.add_argument('--no-workbook', action='store_true', help="Only write the project reports")
+    report_parser.add_argument('-w', '--workers', type=int, default=None,
+                               help="Number of worker processes (default: number of CPUs)")
+    report_parser.add_argument('--parameters', default=None,
+                               help="Global parameters CSV (default: from the configured data source)")
+    report_parser.set_defaults(func=report)
+
+    import_parser = subparsers.add_parser('import', help=import_.__doc__)
+    import_parser.add_argument('paths', nargs='+', help="Project CSV files, directories or glob patterns")
+    import_parser.add_argument('-o', '--output', required=True, help="Portfolio directory to write")
+    import_parser.add_argument('--regions', default=None, help="CSV file with name and region columns")
+    import_parser.set_defaults(func=import_)
+
+    co2_parser = subparsers.add_parser('co2', help=co2.__doc__)
+    co2_parser.add_argument('portfolio', help="Portfolio directory")
+    co2_parser.add_argument('--by', default='region', choices=['region', 'climate', 'landfill_depth'],
+                            help="Column to group projects by (default: region)")
+    co2_parser.add_argument('--parameters', default=None,
+                            help="Global parameters CSV (default: from the configured data source)")
+    co2_parser.set_defaults(func=co2)
+
+    build_parser = subparsers.add_parser('build', help=build.__doc__)
+    build_parser.set_defaults(func=build)
+
+    serve_parser = subparsers.add_parser('serve', help=serve.__doc__)
+    serve_parser.add_argument('--host', default='127.0.0.1', help="Interface to listen on (default: 127.0.0.1)")
+    serve_parser.add_argument('--port', type=int, default=8000, help="Port to listen on (default: 8000)")
+    serve_parser.add_argument('--parameters', default=None,
+                              help="Global parameters CSV (default: from the configured data source)")
+    serve_parser.set_defaults(func=serve)
+
+    args = parser.parse_args(argv)
+    with run(args.command):  # timed with FINISH_KPIS_PROFILE set
+        return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""
+Prebuilt form of the calculation definitions in expressions.py.
+
+The section metadata, rendered LaTeX and compiled kernel source (with a kernel of the partial
+derivatives of every equation, for sensitivity analysis) are serialized to a small JSON artifact in the cache directory. Loading it does not import sympy; the artifact is
+rebuilt (which does) whenever the expression definitions or the parameter CSVs change.
+"""
+import glob
+import hashlib
+import json
+import os
+
+from .kernel import Kernel
+from .sources import default_cache_dir, get_data_source, write_atomic
+
+ARTIFACT_VERSION = 3
+# Files whose contents determine the artifact: the definitions, the code that compiles them and the symbol CSVs
+SOURCE_FILES = ('expressions.py', 'kernel.py', 'equations.py')
+DATA_FILES = ('data/project_parameters.csv', 'data/global_parameters.csv')
+# Artifacts kept in a cache directory, most recently used first; data sources sharing the
+# directory (the package and FINISH_KPIS_DATA_SOURCE) each need their own
+MAX_ARTIFACTS = 8
+
+
+def result_key(label):
+    """Key under which an equation's value is stored in section results."""
+    return label.lower().replace(' ', '_')
+
+
+def _kernel_to_dict(kernel):
+    return {
+        'inputs': list(kernel.inputs),
+        'outputs': [list(output) for output in kernel.outputs],
+        'source': kernel.source,
+    }
+
+
+def _kernel_from_dict(data):
+    return Kernel(data['inputs'], [tuple(output) for output in data['outputs']], data['source'])
+
+
+class Equations:
+    """Section metadata ({calc_key: title, icon, latex and equations}) with the kernels evaluating them.
+
+    `kernel` evaluates every section at once; `section_kernels` evaluate one section each;
+    `gradient` evaluates the non-zero partial derivatives of every output, keyed
+    (calc_key, result key, input name).
+    """
+    def __init__(self, key, sections, kernel, section_kernels, gradient):
+        self.key = key
+        self.sections = sections
+        self.kernel = kernel
+        self.section_kernels = section_kernels
+        self.gradient = gradient
+
+    def to_dict(self):
+        return {
+            'version': ARTIFACT_VERSION,
+            'key': self.key,
+            'sections': self.sections,
+            'kernel': _kernel_to_dict(self.kernel),
+            'section_kernels': {calc_key: _kernel_to_dict(kernel) for calc_key, kernel in self.section_kernels.items()},
+            'gradient': _kernel_to_dict(self.gradient),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['key'], data['sections'], _kernel_from_dict(data['kernel']),
+                   {calc_key: _kernel_from_dict(kernel) for calc_key, kernel in data['section_kernels'].items()},
+                   _kernel_from_dict(data['gradient']))
+
+
+def artifact_key(data_source=None):
+    """Content hash of everything the artifact is built from."""
+    data_source = data_source or get_data_source()
+    digest = hashlib.sha256(str(ARTIFACT_VERSION).encode())
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in SOURCE_FILES:
+        with open(os.path.join(here, name), 'rb') as f:
+            digest.update(f.read())
+    for relpath in DATA_FILES:
+        digest.update(data_source.read_bytes(relpath))
+    return digest.hexdigest()
+
+
+def build_equations(key):
+    """Render and compile the symbolic definitions (imports sympy)."""
+    from . import expressions
+    from .kernel import compile_expressions
+
+    sections = {}
+    for calc_key, calc in expressions.CALCULATION_EXPRESSIONS.items():
+        sections[calc_key] = {
+            'title': calc['title'],
+            'icon': calc['icon'],
+            'latex': expressions.render_latex(calc_key),
+            'equations': {
+                label: {'key': result_key(label), 'units': expr_data['units'], 'decimals': expr_data['decimals']}
+                for label, expr_data in calc['equations'].items()
+            },
+        }
+    # Compile every equation once into a single vectorized kernel, and each section on its own for
+    # incremental evaluation; outputs are (calc_key, result key)
+    section_expressions = {
+        calc_key: {(calc_key, result_key(label)): expr_data['expression'] for label, expr_data in calc['equations'].items()}
+        for calc_key, calc in expressions.CALCULATION_EXPRESSIONS.items()
+    }
+    all_expressions = {output: expr for exprs in section_expressions.values() for output, expr in exprs.items()}
+    kernel = compile_expressions(all_expressions, expressions.sym)
+    section_kernels = {calc_key: compile_expressions(exprs, expressions.sym)
+                       for calc_key, exprs in section_expressions.items()}
+    # Differentiate every equation by each of its inputs once, here, so sensitivities are array arithmetic too
+    derivatives = {}
+    for output, expr in all_expressions.items():
+        for name in kernel.inputs:
+            derivative = expr.diff(expressions.sym[name])
+            if derivative != 0:
+                derivatives[output + (name,)] = derivative
+    gradient = compile_expressions(derivatives, expressions.sym)
+    return Equations(key, sections, kernel, section_kernels, gradient)
+
+
+def artifact_path(key, cache_dir=None):
+    return os.path.join(cache_dir or default_cache_dir(), f'equations-{key[:16]}.json')
+
+
+def prune_artifacts(directory, keep=MAX_ARTIFACTS):
+    """Remove all but the `keep` most recently used artifacts in `directory`."""
+    paths = sorted(glob.glob(os.path.join(directory, 'equations-*.json')), key=os.path.getmtime, reverse=True)
+    for stale_path in paths[keep:]:
+        os.remove(stale_path)
+
+
+def load_equations(cache_dir=None, rebuild=False):
+    """Load the prebuilt artifact, building (and caching) it first if it is missing or stale."""
+    key = artifact_key()
+    path = artifact_path(key, cache_dir)
+    if not rebuild:
+        try:
+            with open(path) as f:
+                equations = Equations.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError):
+            pass
+        else:
+            try:
+                os.utime(path)  # in use: keep it when other sources' artifacts are pruned
+            except OSError:
+                pass
+            return equations
+
+    equations = build_equations(key)
+    try:
+        write_atomic(path, json.dumps(equations.to_dict(), indent=1).encode())
+        prune_artifacts(os.path.dirname(path))
+    except OSError:
+        pass  # an unwritable cache only costs a rebuild on the next start
+    return equations
@@ -0,0 +1,56 @@
+"""
+Compiled NumPy evaluation of the symbolic calculation definitions.
+All expressions are compiled together (with common-subexpression elimination) into a
+single vectorized function, so evaluating the KPIs is plain array arithmetic.
+"""
+import numpy as np
+
+
+class Kernel:
+    """Vectorized evaluator for a fixed, ordered set of expressions."""
+    def __init__(self, inputs, outputs, source):
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.source = source
+        self.index = {name: i for i, name in enumerate(self.inputs)}
+        namespace = {'numpy': np}
+        exec(compile(source, '<kernel>', 'exec'), namespace)
+        self._fn = namespace['kernel']
+
+    def __call__(self, params):
+        """Evaluate every output for `params`, one (broadcastable) array per input.
+
+        Returns an array of shape (len(outputs), *broadcast shape of the inputs).
+        """
+        return np.stack(np.broadcast_arrays(*self._fn(*params)))
+
+    def vector(self, values):
+        """Build the parameter vector from a mapping of input name to value."""
+        return np.array([values[name] for name in self.inputs], dtype=float)
+
+    def evaluate(self, values):
+        """Evaluate all outputs for scalar inputs, returned as {output: float}."""
+        return dict(zip(self.outputs, self(self.vector(values)).tolist()))
+
+
+def compile_expressions(expressions, symbols):
+    """Compile {output: sympy expression} into a Kernel.
+
+    `symbols` is an ordered mapping of name to Symbol; only the symbols the
+    expressions actually use become kernel inputs, in that order.
+    """
+    from sympy import cse, numbered_symbols
+    from sympy.printing.numpy import NumPyPrinter
+
+    outputs = list(expressions)
+    exprs = [expressions[key] for key in outputs]
+    free = set().union(*(expr.free_symbols for expr in exprs))
+    inputs = [name for name, symbol in symbols.items() if symbol in free]
+
+    printer = NumPyPrinter()
+    replacements, reduced = cse(exprs, symbols=numbered_symbols('_cse'))
+    lines = [f"def kernel({', '.join(inputs)}):"]
+    for temp, expr in replacements:
+        lines.append(f"    {temp} = {printer.doprint(expr)}")
+    lines.append(f"    return ({''.join(printer.doprint(expr) + ', ' for expr in reduced)})")
+    return Kernel(inputs, outputs, "\n".join(lines) + "\n")
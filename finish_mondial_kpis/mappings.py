@@ -1,3 +1,25 @@
+from enum import Enum
+
+
+class Climate(str, Enum):
+    """Climate setting of a project; members compare and format as their value (as in project files)."""
+    TROPICAL_WET = 'tropical_wet'
+    TEMPERATE_WET = 'temperate_wet'
+    DRY = 'dry_climate'
+
+    def __str__(self):
+        return self.value
+
+
+class LandfillDepth(str, Enum):
+    """Landfill depth setting of a project; members compare and format as their value."""
+    DEEP = 'deep'
+    SHALLOW = 'shallow'
+
+    def __str__(self):
+        return self.value
+
+
 # Define data categories and field mappings
 DATA_CATEGORIES = {
     'compost': 'Compost (t)',
@@ -10,13 +32,15 @@ QUARTERS = range(1, 5)
 
 # Climate and landfill options
 CLIMATE_OPTIONS = {
-    "Tropical wet climate": "tropical_wet",
-    "Temperate wet climate": "temperate_wet",
-    "Dry Climate": "dry_climate"
+    "Tropical wet climate": Climate.TROPICAL_WET,
+    "Temperate wet climate": Climate.TEMPERATE_WET,
+    "Dry Climate": Climate.DRY
 }
+# Other spellings accepted in project files
+CLIMATE_ALIASES = {"dry": Climate.DRY}
 LANDFILL_OPTIONS = {
-    "Landfill depth > 5m": "deep",
-    "Landfill depth < 5m": "shallow"
+    "Landfill depth > 5m": LandfillDepth.DEEP,
+    "Landfill depth < 5m": LandfillDepth.SHALLOW
 }
 DISPLAY_MAP = {
     v: k for k, v in {**CLIMATE_OPTIONS, **LANDFILL_OPTIONS}.items()
@@ -0,0 +1,114 @@
+"""
+Immutable sets of global parameters and per-session overrides of them.
+
+A ParameterSet keeps the parameter values in one read-only float array and is hashable by the
+content hash of its names, values and metadata (`version`), so it can be shared between
+sessions without copying and used directly as part of a cache key. Edits go into a
+ParameterOverlay, which records only the values that differ from its base set and builds a new
+ParameterSet when asked for one.
+"""
+import hashlib
+from collections import namedtuple
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+Parameter = namedtuple('Parameter', ['name', 'value', 'units', 'source', 'section', 'latex_name',
+                                     'distribution', 'spread'])
+
+
+class ParameterSet(Mapping):
+    """Read-only mapping of parameter name -> Parameter."""
+    def __init__(self, names, values, metadata):
+        self.names = tuple(names)
+        self._index = {name: i for i, name in enumerate(self.names)}
+        self._values = np.array(values, dtype=float)
+        self._values.flags.writeable = False
+        self._metadata = tuple(tuple(meta) for meta in metadata)  # (units, ..., spread) per parameter
+
+        digest = hashlib.sha256(repr((self.names, self._metadata)).encode())
+        digest.update(self._values.tobytes())
+        self.version = digest.hexdigest()
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """Build a parameter set from the rows of global_parameters.csv."""
+        metadata = [(
+            row['units'], row['source'], row['section'], row['latex_name'],
+            row.get('distribution') if pd.notna(row.get('distribution')) else None,
+            float(row['spread']) if pd.notna(row.get('spread')) else 0.0,
+        ) for _, row in df.iterrows()]
+        return cls(df['name'], df['value'].astype(float), metadata)
+
+    @property
+    def values_array(self):
+        """Every parameter value, in the order of `names` (read-only)."""
+        return self._values
+
+    def value(self, name):
+        return float(self._values[self._index[name]])
+
+    def with_values(self, changes):
+        """A new set with the values in `changes` replaced; the metadata is shared."""
+        values = self._values.copy()
+        for name, value in changes.items():
+            values[self._index[name]] = value
+        return ParameterSet(self.names, values, self._metadata)
+
+    def __getitem__(self, name):
+        i = self._index[name]
+        return Parameter(name, float(self._values[i]), *self._metadata[i])
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __hash__(self):
+        return hash(self.version)
+
+    def __eq__(self, other):
+        return isinstance(other, ParameterSet) and self.version == other.version
+
+    def __reduce__(self):
+        return ParameterSet, (self.names, self._values, self._metadata)
+
+    def __repr__(self):
+        return f"<ParameterSet {len(self)} parameters, version {self.version[:12]}>"
+
+
+class ParameterOverlay:
+    """One session's edits on top of a shared ParameterSet; only the changed values are stored."""
+    def __init__(self, base):
+        self.base = base
+        self.overrides = {}
+        self._parameters = base
+
+    def value(self, name):
+        return self.overrides.get(name, self.base.value(name))
+
+    def set(self, name, value):
+        value = float(value)
+        if value == self.value(name):
+            return
+        if value == self.base.value(name):
+            del self.overrides[name]
+        else:
+            self.overrides[name] = value
+        self._parameters = None
+
+    def reset(self):
+        self.overrides = {}
+        self._parameters = self.base
+
+    @property
+    def parameters(self):
+        """The effective ParameterSet (the base itself while nothing is overridden)."""
+        if self._parameters is None:
+            self._parameters = self.base.with_values(self.overrides) if self.overrides else self.base
+        return self._parameters
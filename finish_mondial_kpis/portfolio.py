@@ -0,0 +1,184 @@
+"""
+Columnar storage for portfolios of many projects.
+
+A portfolio is a directory holding
+- quarterly.npy: the quarterly data of every project as one float64 array shaped
+  (project, category, quarter), categories in DATA_CATEGORIES order and zero after each
+  project's last year. It is memory-mapped, so slicing it only reads the pages touched.
+- projects.csv: one row of metadata per project (name, climate, landfill_depth,
+  land_coverage, num_years and an optional region)
+- portfolio.json: the format version, categories and number of quarters
+
+Results and aggregations are evaluated with the compiled kernel over chunks of these arrays,
+never project by project.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .calculations import KERNEL, CO2_ROWS, TOTAL_CO2_OUTPUT, output_name, parameter_values
+from .mappings import DATA_CATEGORIES, QUARTERS
+from .projects import ProjectRecord, parse_csv_file
+from .sensitivity import elasticities, sensitivity_inputs
+
+FORMAT_VERSION = 1
+METADATA_COLUMNS = ['name', 'climate', 'landfill_depth', 'land_coverage', 'num_years', 'region']
+
+
+def is_portfolio(path):
+    return os.path.isfile(os.path.join(path, 'portfolio.json'))
+
+
+class Portfolio:
+    """A portfolio directory opened for reading; `quarterly` is the memory-mapped data array."""
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'portfolio.json')) as f:
+            info = json.load(f)
+        if info.get('version') != FORMAT_VERSION or info.get('categories') != list(DATA_CATEGORIES):
+            raise ValueError(f"{path}: unsupported portfolio format, re-import the projects")
+        self.metadata = pd.read_csv(os.path.join(path, 'projects.csv'), dtype={'name': str, 'region': str})
+        self.metadata['region'] = self.metadata['region'].fillna('')
+        self.quarterly = np.load(os.path.join(path, 'quarterly.npy'), mmap_mode='r')
+        self._index = {name: i for i, name in enumerate(self.metadata['name'])}
+
+    def __len__(self):
+        return len(self.metadata)
+
+    @property
+    def names(self):
+        return list(self.metadata['name'])
+
+    @property
+    def num_quarters(self):
+        return self.quarterly.shape[2]
+
+    def array(self, name):
+        """(category x quarter) view of one project's data, without copying."""
+        return self.quarterly[self._index[name]]
+
+    def project(self, name):
+        """One project as a ProjectRecord (its data copied out of the portfolio)."""
+        meta = self.metadata.iloc[self._index[name]]
+        quarters = int(meta['num_years']) * len(QUARTERS)
+        return ProjectRecord(meta['climate'], meta['landfill_depth'], meta['land_coverage'],
+                             self.array(name)[:, :quarters])
+
+    def _values(self, start, stop, const, per_quarter):
+        """Kernel input values for projects start:stop, per project or per (project, quarter)."""
+        meta = self.metadata.iloc[start:stop]
+        chunk = self.quarterly[start:stop]
+        factors = np.array([const.value(f"{climate}_{landfill}")
+                            for climate, landfill in zip(meta['climate'], meta['landfill_depth'])])
+        coverage = meta['land_coverage'].to_numpy(dtype=float)
+        if per_quarter:
+            # Land coverage is spread evenly over each project's own quarters, as in calculate_series
+            quarters = meta['num_years'].to_numpy() * 4
+            active = np.arange(self.num_quarters) < quarters[:, None]
+            sums = {f'total_{category}': chunk[:, c, :] for c, category in enumerate(DATA_CATEGORIES)}
+            return parameter_values(sums, const, factors[:, None], active * (coverage / quarters)[:, None])
+        sums = {f'total_{category}': chunk[:, c, :].sum(axis=1) for c, category in enumerate(DATA_CATEGORIES)}
+        return parameter_values(sums, const, factors, coverage)
+
+    def _evaluate(self, values, shape):
+        outputs = KERNEL([values[name] for name in KERNEL.inputs])
+        # Pad the dimensions of outputs that do not vary (all of them constant in a zero-data chunk)
+        outputs = outputs.reshape(outputs.shape + (1,) * (1 + len(shape) - outputs.ndim))
+        return np.broadcast_to(outputs, (len(KERNEL.outputs),) + shape)
+
+    def iter_results(self, const, chunk_size=10_000):
+        """Yield DataFrames of per-project results, `chunk_size` projects at a time.
+
+        Columns match the rows of batch.evaluate_project: the settings, category totals, one
+        column per KPI and the total CO2 saved.
+        """
+        for start in range(0, len(self), chunk_size):
+            stop = min(start + chunk_size, len(self))
+            values = self._values(start, stop, const, per_quarter=False)
+            outputs = self._evaluate(values, (stop - start,))
+            meta = self.metadata.iloc[start:stop]
+            results = pd.DataFrame({
+                'project': meta['name'].to_numpy(),
+                'climate': meta['climate'].to_numpy(),
+                'landfill_depth': meta['landfill_depth'].to_numpy(),
+                'land_coverage': meta['land_coverage'].to_numpy(),
+                **{f'total_{category}': values[f'total_{category}'] for category in DATA_CATEGORIES},
+                **{output_name(output): outputs[i] for i, output in enumerate(KERNEL.outputs)},
+                output_name(TOTAL_CO2_OUTPUT): outputs[CO2_ROWS].sum(axis=0),
+            })
+            yield results
+
+    def evaluate(self, const, chunk_size=10_000):
+        """Per-project results of the whole portfolio as one DataFrame."""
+        return pd.concat(self.iter_results(const, chunk_size), ignore_index=True)
+
+    def quarterly_co2(self, const, chunk_size=10_000):
+        """Total CO2 saved per project and quarter, as a (project x quarter) array."""
+        co2 = np.empty((len(self), self.num_quarters))
+        for start in range(0, len(self), chunk_size):
+            stop = min(start + chunk_size, len(self))
+            values = self._values(start, stop, const, per_quarter=True)
+            outputs = self._evaluate(values, (stop - start, self.num_quarters))
+            co2[start:stop] = outputs[CO2_ROWS].sum(axis=0)
+        return co2
+
+    def elasticities(self, const, names=None, output=TOTAL_CO2_OUTPUT):
+        """Elasticities of `output` for every project, as a (project x input) DataFrame."""
+        names = list(names or sensitivity_inputs(const))
+        values = self._values(0, len(self), const, per_quarter=False)
+        return pd.DataFrame(elasticities(values, names, output).T, index=self.names, columns=names)
+
+    def co2_by_year(self, const, by='region'):
+        """Total CO2 saved [tCO2e] per group of the `by` metadata column (or columns) and year."""
+        co2 = self.quarterly_co2(const)
+        per_year = co2.reshape(len(self), self.num_quarters // len(QUARTERS), len(QUARTERS)).sum(axis=2)
+        columns = [f"Y{year}" for year in range(1, per_year.shape[1] + 1)]
+        frame = pd.DataFrame(per_year, columns=columns)
+        keys = [by] if isinstance(by, str) else list(by)
+        for key in keys:
+            frame[key] = self.metadata[key].to_numpy()
+        return frame.groupby(keys, sort=True)[columns].sum()
+
+
+def import_projects(files, path, regions=None, on_error=None):
+    """Build a portfolio at `path` from project CSV files (named by their file name).
+
+    `regions` maps project names to regions. Files that fail to parse, or whose name is already
+    taken by an earlier file, are skipped and reported through `on_error(file, error)` if given.
+    Returns the opened Portfolio.
+    """
+    regions = regions or {}
+    rows, arrays, files_by_name = [], [], {}
+    for file in files:
+        name = os.path.splitext(os.path.basename(file))[0]
+        try:
+            if name in files_by_name:
+                raise ValueError(f"duplicate project name '{name}' (also in {files_by_name[name]})")
+            with open(file, encoding='utf-8-sig', newline='') as f:
+                project = parse_csv_file(f)
+        except (OSError, ValueError) as e:
+            if on_error is None:
+                raise
+            on_error(file, e)
+            continue
+        files_by_name[name] = file
+        arrays.append(project.quarterly)
+        rows.append({'name': name, 'climate': project.climate.value, 'landfill_depth': project.landfill_depth.value,
+                     'land_coverage': project.land_coverage, 'num_years': project.num_years,
+                     'region': regions.get(name, '')})
+
+    os.makedirs(path, exist_ok=True)
+    num_quarters = max((array.shape[1] for array in arrays), default=len(QUARTERS))
+    quarterly = np.lib.format.open_memmap(os.path.join(path, 'quarterly.npy'), mode='w+', dtype=np.float64,
+                                          shape=(len(arrays), len(DATA_CATEGORIES), num_quarters))
+    for i, array in enumerate(arrays):
+        quarterly[i, :, :array.shape[1]] = array
+        quarterly[i, :, array.shape[1]:] = 0.0
+    quarterly.flush()
+    del quarterly
+    pd.DataFrame(rows, columns=METADATA_COLUMNS).to_csv(os.path.join(path, 'projects.csv'), index=False)
+    with open(os.path.join(path, 'portfolio.json'), 'w') as f:
+        json.dump({'version': FORMAT_VERSION, 'categories': list(DATA_CATEGORIES), 'num_quarters': num_quarters}, f)
+    return Portfolio(path)
@@ -0,0 +1,145 @@
+"""
+Per-stage timing of the hot paths, for finding where a rerun spends its time.
+
+Profiling is off unless FINISH_KPIS_PROFILE is set (the app also turns it on with ?profile=1).
+While off, `stage` and `timed` cost one thread-local lookup. While on, the stages timed between
+start_run and finish_run (one app rerun, fragment rerun or command) are collected into a Run and
+written as one JSON line to the file named by FINISH_KPIS_PROFILE_LOG, or stderr.
+"""
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+PROFILE_ENV = 'FINISH_KPIS_PROFILE'
+PROFILE_LOG_ENV = 'FINISH_KPIS_PROFILE_LOG'
+
+_local = threading.local()  # the Run being recorded by this thread (each rerun runs in its own thread)
+_log_lock = threading.Lock()
+_disabled = nullcontext()
+
+
+def enabled():
+    """Whether profiling is turned on by the environment."""
+    return os.environ.get(PROFILE_ENV, '').lower() not in ('', '0', 'false', 'no')
+
+
+class Run:
+    """Timings of the stages of one run, in the order they started."""
+    def __init__(self, name, context):
+        self.name = name
+        self.context = context
+        self.stages = []  # (stage, depth, seconds)
+        self.depth = 0
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self.elapsed = None
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self._start
+
+    def to_dict(self):
+        return {'run': self.name, 'time': self.started, **self.context,
+                'total_ms': round(self.elapsed * 1000, 3) if self.elapsed is not None else None,
+                'stages': [{'stage': name, 'depth': depth, 'ms': round(seconds * 1000, 3)}
+                           for name, depth, seconds in self.stages]}
+
+
+class _Stage:
+    def __init__(self, run, name):
+        self.run = run
+        self.name = name
+
+    def __enter__(self):
+        self.index = len(self.run.stages)
+        self.run.stages.append((self.name, self.run.depth, None))
+        self.run.depth += 1
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        self.run.depth -= 1
+        self.run.stages[self.index] = (self.name, self.run.depth, seconds)
+
+
+def current_run():
+    return getattr(_local, 'run', None)
+
+
+def stage(name):
+    """Context manager timing `name` as a stage of the current run (a no-op outside one)."""
+    run = getattr(_local, 'run', None)
+    if run is None:
+        return _disabled
+    return _Stage(run, name)
+
+
+def timed(name):
+    """Decorator timing every call of the function as stage `name`."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            run = getattr(_local, 'run', None)
+            if run is None:
+                return func(*args, **kwargs)
+            with _Stage(run, name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def start_run(name, enable=None, **context):
+    """Start recording a run in this thread (replacing any unfinished one); None if profiling is off.
+
+    `enable` overrides the environment; `context` is added to the JSON line.
+    """
+    if not (enabled() if enable is None else enable):
+        _local.run = None
+        return None
+    _local.run = Run(name, context)
+    return _local.run
+
+
+def finish_run():
+    """Stop recording, write the run's JSON line and return the Run (None if none was recorded)."""
+    run = getattr(_local, 'run', None)
+    if run is None:
+        return None
+    _local.run = None
+    run.finish()
+    _write(run)
+    return run
+
+
+@contextmanager
+def run(name, enable=None, **context):
+    """Record the block as a run of its own, or as a stage when a run is already being recorded.
+
+    Yields the new Run (finished once the block exits), or None.
+    """
+    if getattr(_local, 'run', None) is not None:
+        with stage(name):
+            yield None
+        return
+    recorded = start_run(name, enable, **context)
+    if recorded is None:
+        yield None
+        return
+    try:
+        yield recorded
+    finally:
+        finish_run()
+
+
+def _write(run):
+    line = json.dumps(run.to_dict()) + '\n'
+    path = os.environ.get(PROFILE_LOG_ENV)
+    with _log_lock:
+        if path:
+            with open(path, 'a') as f:
+                f.write(line)
+        else:
+            sys.stderr.write(line)
@@ -0,0 +1,263 @@
+"""
+Reading and writing project data in the standard quarterly CSV format.
+"""
+import csv
+import io
+import math
+import re
+import numpy as np
+import pandas as pd
+
+from .mappings import (
+    DATA_CATEGORIES, QUARTERS, CLIMATE_OPTIONS, CLIMATE_ALIASES, LANDFILL_OPTIONS, Climate, LandfillDepth
+)
+from .profiling import timed
+
+QUARTER_COLUMN = re.compile(r'Y(\d+)Q([1-4])$')
+# Longest project accepted, so a header cannot make the parser allocate an unbounded array
+MAX_YEARS = 1000
+# Labels that introduce each project setting (the value is on the following line)
+SETTING_LABELS = {
+    'climate': 'Climate',
+    'landfill_depth': 'Landfill depth',
+    'land_coverage': 'Land Coverage',
+}
+
+
+class ProjectRecord:
+    """One project's settings and quarterly data.
+
+    `quarterly` is a contiguous float64 array shaped (category, quarter): categories in
+    DATA_CATEGORIES order, quarters Y1Q1, Y1Q2, ... over whole years.
+    """
+    __slots__ = ('climate', 'landfill_depth', 'land_coverage', 'quarterly')
+
+    def __init__(self, climate, landfill_depth, land_coverage, quarterly):
+        self.climate = Climate(climate)
+        self.landfill_depth = LandfillDepth(landfill_depth)
+        self.land_coverage = float(land_coverage)
+        quarterly = np.ascontiguousarray(quarterly, dtype=np.float64)
+        if quarterly.ndim != 2 or quarterly.shape[0] != len(DATA_CATEGORIES) or quarterly.shape[1] % len(QUARTERS):
+            raise ValueError(f"quarterly data must be shaped ({len(DATA_CATEGORIES)}, 4 x years), not {quarterly.shape}")
+        self.quarterly = quarterly
+
+    @classmethod
+    def empty(cls, num_years, climate=Climate.TROPICAL_WET, landfill_depth=LandfillDepth.DEEP, land_coverage=500.0):
+        """A project without any quarterly data."""
+        return cls(climate, landfill_depth, land_coverage, np.zeros((len(DATA_CATEGORIES), num_years * len(QUARTERS))))
+
+    @property
+    def num_years(self):
+        return self.quarterly.shape[1] // len(QUARTERS)
+
+    @property
+    def conversion_factor_name(self):
+        """Name of the global parameter holding this project's landfill conversion factor."""
+        return f"{self.climate}_{self.landfill_depth}"
+
+    def sums(self):
+        """Total of each data category over all quarters, keyed 'total_<category>'."""
+        return {f'total_{category}': float(total) for category, total in zip(DATA_CATEGORIES, self.quarterly.sum(axis=1))}
+
+    def to_dict(self):
+        """Flat form with one '<category>_y<year>q<quarter>' value per quarter (as taken by from_dict)."""
+        data = {'climate': self.climate.value, 'landfill_depth': self.landfill_depth.value,
+                'land_coverage': self.land_coverage, 'num_years': self.num_years}
+        for category, row in zip(DATA_CATEGORIES, self.quarterly.tolist()):
+            for i, value in enumerate(row):
+                data[f'{category}_y{i // 4 + 1}q{i % 4 + 1}'] = value
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from the flat form of to_dict; quarters that are not given are 0.
+
+        Raises ValueError for a number of years outside 1..MAX_YEARS and for values that are not
+        finite and non-negative, as parse_csv_file does.
+        """
+        num_years = int(data['num_years'])
+        if not 1 <= num_years <= MAX_YEARS:
+            raise ValueError(f"num_years must be between 1 and {MAX_YEARS}, not {num_years}")
+        quarterly = np.array([[data.get(f'{category}_y{year}q{quarter}', 0.0)
+                               for year in range(1, num_years + 1) for quarter in QUARTERS]
+                              for category in DATA_CATEGORIES], dtype=float)
+        if not (np.isfinite(quarterly).all() and (quarterly >= 0).all()):
+            raise ValueError("quarterly values must be non-negative numbers")
+        land_coverage = float(data['land_coverage'])
+        if not math.isfinite(land_coverage) or land_coverage < 0:
+            raise ValueError("land_coverage must be a non-negative number")
+        return cls(data['climate'], data['landfill_depth'], land_coverage, quarterly)
+
+    def __eq__(self, other):
+        return (isinstance(other, ProjectRecord) and self.climate == other.climate
+                and self.landfill_depth == other.landfill_depth and self.land_coverage == other.land_coverage
+                and np.array_equal(self.quarterly, other.quarterly))
+
+    def __repr__(self):
+        return (f"ProjectRecord({self.climate.value!r}, {self.landfill_depth.value!r}, {self.land_coverage!r}, "
+                f"<{self.num_years} years>)")
+
+
+class ProjectFileError(ValueError):
+    """A project CSV that does not match the expected format, with the location of the problem."""
+    def __init__(self, message, line=None, column=None):
+        location = ", ".join(part for part in (line and f"line {line}", column and f"column {column}") if part)
+        super().__init__(f"{location}: {message}" if location else message)
+        self.line = line
+        self.column = column
+
+
+def _parse_setting(field, value, line):
+    """Validate the value of a labelled project setting."""
+    if field == 'land_coverage':
+        try:
+            land_coverage = float(value)
+        except ValueError:
+            raise ProjectFileError(f"invalid land coverage '{value}'", line, 1)
+        if not math.isfinite(land_coverage) or land_coverage < 0:
+            raise ProjectFileError(f"land coverage must be a non-negative number, not '{value}'", line, 1)
+        return land_coverage
+    options = CLIMATE_OPTIONS if field == 'climate' else LANDFILL_OPTIONS
+    value = CLIMATE_ALIASES.get(value, value) if field == 'climate' else value
+    if value not in options.values():
+        raise ProjectFileError(f"invalid {field.replace('_', ' ')} '{value}', expected one of: "
+                               f"{', '.join(options.values())}", line, 1)
+    return value
+
+
+def _parse_header(row, line):
+    """Return (year, quarter, column index, column name) for each quarterly column of the header row."""
+    columns = []
+    seen = set()
+    for index, name in enumerate(row[1:], start=1):
+        name = name.strip()
+        match = QUARTER_COLUMN.match(name)
+        if match:
+            year, quarter = int(match.group(1)), int(match.group(2))
+            if not 1 <= year <= MAX_YEARS:
+                raise ProjectFileError(f"year of column '{name}' must be between 1 and {MAX_YEARS}", line, index + 1)
+            if (year, quarter) in seen:
+                raise ProjectFileError(f"duplicate column '{name}'", line, index + 1)
+            seen.add((year, quarter))
+            columns.append((year, quarter, index, name))
+        elif name:
+            raise ProjectFileError(f"unexpected column '{name}', expected Y<year>Q<quarter>", line, index + 1)
+    if not columns:
+        raise ProjectFileError("no Y<year>Q<quarter> columns in the quarterly data header", line)
+    return columns
+
+
+@timed('parse_csv_file')
+def parse_csv_file(content):
+    """Parse CSV file in the known format and return a ProjectRecord.
+
+    `content` is the decoded text or any iterable of lines (such as an open file), which is
+    read as a stream. Settings are found by their labels, every Y<year>Q<quarter> column is
+    read (quarters without a column are 0), and categories are validated against
+    DATA_CATEGORIES. Problems raise ProjectFileError with the line and column they were found at.
+    """
+    reader = csv.reader(io.StringIO(content) if isinstance(content, str) else content)
+    categories = {name: i for i, name in enumerate(DATA_CATEGORIES.values())}
+    settings = {}
+    rows = {}  # category index -> values in the order of `columns`
+    pending = None  # setting whose value is on the next non-empty line
+    columns = None  # quarterly columns, once the header has been read
+    for row in reader:
+        first = row[0].strip() if row else ''
+        if columns is None:
+            # Settings block: a label line followed by its value
+            if not first or first.startswith('#'):
+                continue
+            if pending:
+                settings[pending] = _parse_setting(pending, first, reader.line_num)
+                pending = None
+            elif first == 'Category':
+                columns = _parse_header(row, reader.line_num)
+            else:
+                pending = next((field for field, label in SETTING_LABELS.items() if first.startswith(label)), None)
+                if pending is None:
+                    raise ProjectFileError(f"unexpected line '{first}'", reader.line_num, 1)
+            continue
+
+        # Quarterly data block: one row per category
+        if not any(cell.strip() for cell in row):
+            continue
+        category = categories.get(first)
+        if category is None:
+            raise ProjectFileError(f"unknown category '{first}', expected one of: "
+                                   f"{', '.join(DATA_CATEGORIES.values())}", reader.line_num, 1)
+        if category in rows:
+            raise ProjectFileError(f"duplicate category '{first}'", reader.line_num, 1)
+        values = rows[category] = []
+        for year, quarter, index, name in columns:
+            cell = row[index].strip() if index < len(row) else ''
+            try:
+                value = float(cell) if cell else 0.0
+            except ValueError:
+                raise ProjectFileError(f"invalid number '{cell}' for {first} {name}", reader.line_num, index + 1)
+            if not math.isfinite(value) or value < 0:
+                raise ProjectFileError(f"{first} {name} must be a non-negative number, not '{cell}'",
+                                       reader.line_num, index + 1)
+            values.append(value)
+
+    missing = [label for field, label in SETTING_LABELS.items() if field not in settings]
+    if missing:
+        raise ProjectFileError(f"missing setting(s): {', '.join(missing)}")
+    if columns is None:
+        raise ProjectFileError("missing quarterly data header (a 'Category,Y1Q1,...' line)")
+    missing = [name for name, i in categories.items() if i not in rows]
+    if missing:
+        raise ProjectFileError(f"missing category row(s): {', '.join(missing)}")
+
+    num_years = max(year for year, _, _, _ in columns)
+    quarterly = np.zeros((len(DATA_CATEGORIES), num_years * len(QUARTERS)))
+    positions = [(year - 1) * len(QUARTERS) + quarter - 1 for year, quarter, _, _ in columns]
+    for category, values in rows.items():
+        quarterly[category, positions] = values
+    return ProjectRecord(settings['climate'], settings['landfill_depth'], settings['land_coverage'], quarterly)
+
+
+def create_quarterly_dataframe(project, num_years, quarterly_cols):
+    """Create the quarterly data DataFrame of a ProjectRecord for `num_years` years (years without data are 0)."""
+    values = np.zeros((len(DATA_CATEGORIES), len(quarterly_cols)))
+    shown = min(project.quarterly.shape[1], len(quarterly_cols))
+    values[:, :shown] = project.quarterly[:, :shown]
+    return pd.DataFrame(values, index=pd.Index(list(DATA_CATEGORIES.values()), name=''), columns=quarterly_cols)
+
+def get_quarterly_colnames(num_years):
+    """Generate quarterly column names for a given number of years."""
+    return [f"Y{year}Q{quarter}" for year in range(1, num_years + 1) for quarter in QUARTERS]
+
+def format_csv(project):
+    """Write a ProjectRecord in the standard CSV format."""
+    quarterly_cols = get_quarterly_colnames(project.num_years)
+    lines = [
+        'Climate ("temperate_wet" "tropical_wet" or "dry"),,,,',
+        f'{project.climate},,,',
+        ',,,',
+        'Landfill depth ("shallow" if <5m or "deep" if >5m),,,,',
+        f'{project.landfill_depth},,,',
+        ',,,',
+        'Land Coverage (acres),,,,',
+        f'{project.land_coverage!r},,,',
+        ',,,',
+        "# Quarterly Data",
+        ",".join(["Category"] + quarterly_cols)
+    ]
+
+    # Add data rows
+    for category_name, row in zip(DATA_CATEGORIES.values(), project.quarterly.tolist()):
+        lines.append(",".join([category_name] + [repr(value) for value in row]))
+
+    return "\n".join(lines)
+
+
+def create_csv_template(num_years):
+    """Create CSV template in the new format."""
+    return format_csv(ProjectRecord.empty(num_years))
+
+
+def quarterly_array(df, quarterly_cols):
+    """Parse the quarterly block of a data DataFrame as one (category x quarter) float array, blanks as 0."""
+    block = df.loc[list(DATA_CATEGORIES.values()), quarterly_cols]
+    return block.apply(pd.to_numeric, errors='coerce').fillna(0).to_numpy(dtype=float)
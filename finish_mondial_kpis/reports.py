@@ -0,0 +1,260 @@
+"""
+Exportable reports of the results.
+
+Every project gets a Markdown report with each section's results and units, its equations (the
+prerendered LaTeX) and the value, units and source of every global parameter it uses. Reports
+are rendered in a process pool, a bounded window of projects at a time and in input order.
+The portfolio workbook (.xlsx, with the optional xlsxwriter dependency) is written in
+constant-memory mode, each row flushed to disk as soon as the next one starts, so exporting a
+portfolio of any size keeps a fixed memory budget.
+"""
+import importlib.util
+import os
+import tempfile
+import zipfile
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .batch import project_row
+from .calculations import EQUATIONS, KERNEL, KPI_LABELS, SECTIONS, TOTAL_CO2_OUTPUT, generate_latex, output_name
+from .mappings import DATA_CATEGORIES, DISPLAY_MAP, Climate, LandfillDepth
+from .profiling import timed
+from .projects import parse_csv_file
+
+ProjectReport = namedtuple('ProjectReport', ['name', 'row', 'text'])  # row as in batch.project_row
+
+WORKBOOK_NAME = 'portfolio.xlsx'
+
+# Inputs each section depends on (a nonzero derivative), in kernel order
+SECTION_INPUTS = {calc_key: [] for calc_key in SECTIONS}
+for calc_key, _, name in EQUATIONS.gradient.outputs:
+    if name not in SECTION_INPUTS[calc_key]:
+        SECTION_INPUTS[calc_key].append(name)
+
+# The landfill conversion factor is one of these parameters, by the project's climate and landfill depth
+CONVERSION_FACTORS = [f"{climate}_{landfill_depth}" for climate in Climate for landfill_depth in LandfillDepth]
+
+# Constants shared by every task in a worker process (set by _init_worker)
+_const = None
+
+
+def section_parameters(calc_key, project, const):
+    """Global parameters used by a section for `project` (its own landfill conversion factor)."""
+    names = [project.conversion_factor_name if name == 'landfill_conversion_factor' else name
+             for name in SECTION_INPUTS[calc_key]]
+    return [const[name] for name in names if name in const]
+
+
+def _parameter_value(value):
+    """A parameter value in full, without exponent (some are factors of a few millionths)."""
+    return np.format_float_positional(value, trim='-')
+
+
+def _table(header, rows):
+    lines = ['| ' + ' | '.join(header) + ' |', '|' + '---|' * len(header)]
+    lines += ['| ' + ' | '.join(str(cell).replace('|', '\\|') for cell in row) + ' |' for row in rows]
+    return '\n'.join(lines)
+
+
+@timed('project_report')
+def project_report(name, project, const, row=None):
+    """Markdown report of one ProjectRecord; `row` is its batch.project_row if already evaluated."""
+    row = row or project_row(name, project, const)
+    parts = [
+        f"# {name}",
+        _table(['Setting', 'Value'], [
+            ['Climate', DISPLAY_MAP[project.climate]],
+            ['Landfill depth', DISPLAY_MAP[project.landfill_depth]],
+            ['Land coverage', f"{project.land_coverage:,.2f} acres"],
+            ['Years', project.num_years],
+        ]),
+        _table(['Input', 'Total over all quarters'],
+               [[label, f"{row[f'total_{category}']:,.2f}"] for category, label in DATA_CATEGORIES.items()]),
+    ]
+    for calc_key, calc in SECTIONS.items():
+        parts.append(f"## {calc['title']}")
+        parts.append(_table(['Result', 'Value', 'Units'], [
+            [label, f"{row[output_name((calc_key, equation['key']))]:.{equation['decimals']}f}", equation['units']]
+            for label, equation in calc['equations'].items()
+        ]))
+        parts.append(f"$$\n{generate_latex(calc_key)}\n$$")
+        parameters = section_parameters(calc_key, project, const)
+        if parameters:
+            parts.append(_table(['Parameter', 'Value', 'Units', 'Source'],
+                                [[p.name, _parameter_value(p.value), p.units, p.source] for p in parameters]))
+    label, units = KPI_LABELS[TOTAL_CO2_OUTPUT]
+    parts.append(f"## Summary\n\n**{label}: {row[output_name(TOTAL_CO2_OUTPUT)]:.0f} {units}**")
+    return '\n\n'.join(parts) + '\n'
+
+
+def _render(item, const):
+    """ProjectReport of a project CSV path or a (name, ProjectRecord) pair."""
+    if isinstance(item, str):
+        with open(item, encoding='utf-8-sig', newline='') as f:
+            name, project = os.path.splitext(os.path.basename(item))[0], parse_csv_file(f)
+    else:
+        name, project = item
+    row = project_row(name, project, const)
+    return ProjectReport(name, row, project_report(name, project, const, row))
+
+
+def _init_worker(const):
+    global _const
+    _const = const
+
+
+def _render_in_worker(item):
+    return _render(item, _const)
+
+
+def render_reports(items, const, workers=None, on_error=None, window=256):
+    """Yield the ProjectReport of every item (a project CSV path or a (name, ProjectRecord) pair) in order.
+
+    With `workers` > 1 (or None: the number of CPUs) reports are rendered in a process pool, at
+    most `window` items ahead of the one being yielded, so `items` can be a generator over any
+    number of projects. Items that fail are skipped and reported through `on_error(item, error)`
+    if given.
+    """
+    def collect(item, get):
+        try:
+            return get()
+        except Exception as e:
+            if on_error is None:
+                raise
+            on_error(item[0] if isinstance(item, tuple) else item, e)
+
+    if workers == 1:
+        for item in items:
+            report = collect(item, lambda: _render(item, const))
+            if report is not None:
+                yield report
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(const,)) as executor:
+        pending = deque()
+        for item in items:
+            pending.append((item, executor.submit(_render_in_worker, item)))
+            while len(pending) >= window or (pending and pending[0][1].done()):
+                item, future = pending.popleft()
+                report = collect(item, future.result)
+                if report is not None:
+                    yield report
+        while pending:
+            item, future = pending.popleft()
+            report = collect(item, future.result)
+            if report is not None:
+                yield report
+
+
+def workbook_available():
+    """Whether xlsxwriter is installed, for WorkbookWriter."""
+    return importlib.util.find_spec('xlsxwriter') is not None
+
+
+class WorkbookWriter:
+    """Portfolio workbook (.xlsx) written in xlsxwriter's constant-memory mode.
+
+    Sheets: Summary (one row per project, as in the batch output, and a Total row), Results
+    (project, result, value, units), Parameters (the global parameters and their sources) and
+    Equations (the LaTeX of every section).
+    """
+    def __init__(self, path, const):
+        try:
+            import xlsxwriter
+        except ImportError:
+            raise ImportError("Excel workbooks require xlsxwriter: pip install 'finish-mondial-kpis[report]'")
+        self._workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+        self._bold = self._workbook.add_format({'bold': True})
+        self._summary = self._workbook.add_worksheet('Summary')
+        self._results = self._workbook.add_worksheet('Results')
+        self._columns = None
+        self._totals = None
+        self._projects = 0
+        self._result_rows = 0
+        self._results.write_row(0, 0, ['project', 'result', 'value', 'units'], self._bold)
+
+        used_by = {}
+        for calc_key, names in SECTION_INPUTS.items():
+            for name in names:
+                used_by.setdefault(name, []).append(calc_key.upper())
+        parameters = self._workbook.add_worksheet('Parameters')
+        parameters.write_row(0, 0, ['name', 'value', 'units', 'source', 'used in'], self._bold)
+        for i, p in enumerate(const.values(), 1):
+            name = 'landfill_conversion_factor' if p.name in CONVERSION_FACTORS else p.name
+            sections = used_by.get(name, [])
+            parameters.write_row(i, 0, [p.name, p.value, p.units, p.source, ', '.join(sections)])
+        equations = self._workbook.add_worksheet('Equations')
+        equations.write_row(0, 0, ['section', 'title', 'latex'], self._bold)
+        for i, (calc_key, calc) in enumerate(SECTIONS.items(), 1):
+            equations.write_row(i, 0, [calc_key, calc['title'], generate_latex(calc_key)])
+
+    def write(self, report):
+        row = report.row
+        if self._columns is None:
+            self._columns = list(row)
+            self._totals = {column: 0.0 for column in self._columns[3:]}  # after project, climate, landfill_depth
+            self._summary.write_row(0, 0, self._columns, self._bold)
+        self._projects += 1
+        self._summary.write_row(self._projects, 0, [row[column] for column in self._columns])
+        for column in self._totals:
+            self._totals[column] += row[column]
+        for output in list(KERNEL.outputs) + [TOTAL_CO2_OUTPUT]:
+            label, units = KPI_LABELS[output]
+            self._result_rows += 1
+            self._results.write_row(self._result_rows, 0, [report.name, label, row[output_name(output)], units])
+
+    def close(self):
+        from xlsxwriter.utility import xl_rowcol_to_cell
+        if self._projects:
+            total_row = self._projects + 1
+            self._summary.write(total_row, 0, 'Total', self._bold)
+            for j, column in enumerate(self._columns[3:], 3):
+                cells = f"{xl_rowcol_to_cell(1, j)}:{xl_rowcol_to_cell(self._projects, j)}"
+                self._summary.write_formula(total_row, j, f"=SUM({cells})", self._bold, self._totals[column])
+        self._workbook.close()
+
+
+def write_reports(reports, save, workbook=None, on_error=None):
+    """Save every ProjectReport's text with save(file name, text) and add it to the `workbook` writer.
+
+    A report whose name is already taken by an earlier one is skipped rather than overwriting
+    it, and reported through `on_error(name, error)` if given. Returns the number of reports written.
+    """
+    count = 0
+    seen = set()
+    for report in reports:
+        filename = f"{report.name}.md"
+        if filename.casefold() in seen:  # case-insensitive file systems would overwrite these too
+            error = ValueError(f"duplicate report name '{report.name}'")
+            if on_error is None:
+                raise error
+            on_error(report.name, error)
+            continue
+        seen.add(filename.casefold())
+        save(filename, report.text)
+        if workbook is not None:
+            workbook.write(report)
+        count += 1
+    if workbook is not None:
+        workbook.close()
+    return count
+
+
+def report_archive(items, const, workbook=True, workers=1, on_error=None):
+    """ZIP archive of the reports of `items` (as for render_reports) and, with `workbook`, the portfolio workbook.
+
+    Items that fail, or whose name repeats an earlier one, are reported through `on_error`. The
+    archive is built in a temporary file and returned as bytes, as st.download_button takes them.
+    """
+    with tempfile.TemporaryFile() as archive_file:
+        with zipfile.ZipFile(archive_file, 'w', zipfile.ZIP_DEFLATED) as archive, \
+                tempfile.TemporaryDirectory() as directory:
+            workbook_path = os.path.join(directory, WORKBOOK_NAME)
+            writer = WorkbookWriter(workbook_path, const) if workbook else None
+            write_reports(render_reports(items, const, workers, on_error), archive.writestr, writer, on_error)
+            if writer is not None:
+                archive.write(workbook_path, WORKBOOK_NAME)
+        archive_file.seek(0)
+        return archive_file.read()
@@ -0,0 +1,48 @@
+"""
+Scenario grids: every KPI over the cross product of climate settings, landfill depths, land
+coverage values and parameter sweeps, evaluated as one broadcasted kernel call.
+"""
+import numpy as np
+import pandas as pd
+
+from .calculations import KERNEL, CO2_ROWS, TOTAL_CO2_OUTPUT, output_name
+
+
+def evaluate_grid(values, const, climates, landfills, land_coverages, sweeps=None):
+    """Evaluate every KPI for each combination of the scenario axes.
+
+    `values` holds the point value of every kernel input (see parameter_values); `climates`
+    and `landfills` are option keys such as 'tropical_wet' and 'deep'; `sweeps` maps other
+    kernel inputs to the values to try. Each axis gets its own array dimension, so the whole
+    grid is a single kernel call. Returns a tidy DataFrame with one row per scenario: the
+    axis values followed by one column per KPI and the total CO2 saved.
+    """
+    sweeps = dict(sweeps or {})
+    for name in sweeps:
+        if name not in KERNEL.inputs or name in ('landfill_conversion_factor', 'land_coverage'):
+            raise ValueError(f"Cannot sweep '{name}': not a calculation parameter")
+    axes = [('climate', list(climates)), ('landfill_depth', list(landfills)),
+            ('land_coverage', np.asarray(land_coverages, dtype=float))]
+    axes += [(name, np.asarray(sweep, dtype=float)) for name, sweep in sweeps.items()]
+    shape = tuple(len(axis_values) for _, axis_values in axes)
+
+    def along(axis, array):
+        """Reshape a 1-D array to vary along one dimension of the grid."""
+        return np.reshape(array, [n if i == axis else 1 for i, n in enumerate(shape)])
+
+    params = dict(values)
+    factors = np.array([[const.value(f"{climate}_{landfill}") for landfill in landfills] for climate in climates])
+    params['landfill_conversion_factor'] = factors.reshape(shape[:2] + (1,) * (len(shape) - 2))
+    params['land_coverage'] = along(2, axes[2][1])
+    for axis, (name, sweep) in enumerate(axes[3:], start=3):
+        params[name] = along(axis, sweep)
+
+    outputs = np.broadcast_to(KERNEL([params[name] for name in KERNEL.inputs]), (len(KERNEL.outputs),) + shape)
+    outputs = outputs.reshape(len(KERNEL.outputs), -1)
+
+    index = np.indices(shape).reshape(len(shape), -1)
+    grid = {name: (pd.Categorical.from_codes(index[axis], axis_values) if axis < 2 else axis_values[index[axis]])
+            for axis, (name, axis_values) in enumerate(axes)}
+    grid.update({output_name(output): outputs[i] for i, output in enumerate(KERNEL.outputs)})
+    grid[output_name(TOTAL_CO2_OUTPUT)] = outputs[CO2_ROWS].sum(axis=0)
+    return pd.DataFrame(grid)
@@ -0,0 +1,79 @@
+"""
+Sensitivity of the results to the calculation inputs.
+
+Elasticities (the % change of a result per 1% change of an input) come from the partial
+derivatives compiled into the equations artifact, so they are exact and cost one kernel call
+for any number of projects. One-at-a-time sweeps move each input by ±X% on its own; every
+low and high scenario is a row of one batched kernel call.
+"""
+import numpy as np
+import pandas as pd
+
+from .calculations import EQUATIONS, KERNEL, CO2_ROWS, TOTAL_CO2_OUTPUT, project_values
+
+GRADIENT = EQUATIONS.gradient
+
+
+def _output_rows(output):
+    """Kernel output rows summed to give `output` (every CO2 saved row for the total)."""
+    if output == TOTAL_CO2_OUTPUT:
+        return CO2_ROWS
+    return [KERNEL.outputs.index(output)]
+
+
+def sensitivity_inputs(const):
+    """Kernel inputs worth analysing: the global parameters (without unit conversions), the
+    landfill conversion factor and the land coverage."""
+    return [name for name in KERNEL.inputs
+            if (name in const and const[name].section != 'Conversions')
+            or name in ('landfill_conversion_factor', 'land_coverage')]
+
+
+def elasticities(values, names, output=TOTAL_CO2_OUTPUT):
+    """Elasticity of `output` with respect to each input in `names`, at `values`.
+
+    `values` maps every kernel input to a value or an array (e.g. one element per project).
+    Returns an array shaped (len(names), *broadcast shape of the values); NaN where the output is 0.
+    """
+    shape = np.broadcast_shapes(*(np.shape(values[name]) for name in KERNEL.inputs))
+    rows = _output_rows(output)
+    result = np.broadcast_to(KERNEL([values[name] for name in KERNEL.inputs])[rows].sum(axis=0), shape)
+
+    targets = {KERNEL.outputs[i] for i in rows}
+    index = {name: i for i, name in enumerate(names)}
+    gradient = GRADIENT([values[name] for name in GRADIENT.inputs])
+    derivative = np.zeros((len(names),) + shape)
+    for row, (calc_key, key, name) in enumerate(GRADIENT.outputs):
+        if (calc_key, key) in targets and name in index:
+            derivative[index[name]] += gradient[row]
+    inputs = np.stack([np.broadcast_to(values[name], shape) for name in names])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(result != 0, derivative * inputs / result, np.nan)
+
+
+def project_elasticities(projects, const, names=None, output=TOTAL_CO2_OUTPUT):
+    """Elasticities of `output` for every project in {name: ProjectRecord}, as a (project x input) DataFrame."""
+    names = list(names or sensitivity_inputs(const))
+    if not projects:
+        return pd.DataFrame(columns=names, dtype=float)
+    values = project_values(list(projects.values()), const)
+    return pd.DataFrame(elasticities(values, names, output).T, index=list(projects), columns=names)
+
+
+def one_at_a_time(values, names, spread, output=TOTAL_CO2_OUTPUT):
+    """`output` with each input in `names` moved by -spread and +spread (a fraction) on its own.
+
+    Every scenario is evaluated in one kernel call: the inputs become (2, len(names)) arrays,
+    low/high by moved input. Returns a DataFrame indexed by input with the 'low', 'base' and
+    'high' values of the output, sorted by the size of the swing.
+    """
+    moved = 1 + spread * np.array([-1.0, 1.0])[:, None] * np.eye(len(names))[:, None, :]  # (input, 2, names)
+    params = dict(values)
+    for i, name in enumerate(names):
+        params[name] = values[name] * moved[i]
+    rows = _output_rows(output)
+    scenarios = np.broadcast_to(KERNEL([params[name] for name in KERNEL.inputs])[rows].sum(axis=0),
+                                (2, len(names)))
+    base = KERNEL([values[name] for name in KERNEL.inputs])[rows].sum()
+    sweep = pd.DataFrame({'low': scenarios[0], 'base': base, 'high': scenarios[1]}, index=pd.Index(names, name='input'))
+    return sweep.loc[(sweep['high'] - sweep['low']).abs().sort_values(ascending=False).index]
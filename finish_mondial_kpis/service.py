@@ -0,0 +1,206 @@
+"""
+Local HTTP service returning the KPI calculations as JSON, for systems that need them programmatically.
+Requires the optional service dependencies: pip install 'finish-mondial-kpis[service]'.
+
+Endpoints:
+- POST /kpis: one project, as project CSV text or the JSON returned by /parse
+- POST /batch: {"projects": [...]}, every valid project evaluated in one vectorized kernel call
+- POST /parse: project CSV text -> project data
+- GET /latex/{calc_key}: prerendered LaTeX equations of a section
+- GET /health: parameter-set version and response cache statistics
+
+Start it with `finish-kpis serve` or `uvicorn --factory finish_mondial_kpis.service:create_app`.
+Responses are cached in memory under the hash of the request and the parameter-set version.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+try:
+    from starlette.applications import Starlette
+    from starlette.concurrency import run_in_threadpool
+    from starlette.responses import Response
+    from starlette.routing import Route
+except ImportError:
+    raise ImportError("The KPI service requires starlette and uvicorn: pip install 'finish-mondial-kpis[service]'")
+
+from .calculations import (EQUATIONS, KERNEL, SECTIONS, CO2_ROWS, TOTAL_CO2_OUTPUT,
+                           generate_latex, load_constants, project_values)
+from .mappings import CLIMATE_OPTIONS, LANDFILL_OPTIONS
+from .projects import ProjectFileError, ProjectRecord, parse_csv_file
+
+
+class RequestError(ValueError):
+    """An invalid request, reported to the client as a 400 response."""
+
+
+def parameters_version(const):
+    """Hash of the parameter set and the equations it is used in."""
+    return hashlib.sha256(f"{EQUATIONS.key}:{const.version}".encode()).hexdigest()[:16]
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of encoded responses."""
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        return {'entries': len(self._entries), 'max_entries': self.max_entries,
+                'hits': self.hits, 'misses': self.misses}
+
+
+def _project(payload):
+    """ProjectRecord from CSV text or an already parsed project object (in the ProjectRecord.to_dict form)."""
+    if isinstance(payload, str):
+        return parse_csv_file(payload)
+    if not isinstance(payload, dict):
+        raise RequestError("a project must be CSV text or an object")
+    if 'csv' in payload:
+        return parse_csv_file(payload['csv'])
+    missing = [field for field in ('climate', 'landfill_depth', 'land_coverage', 'num_years') if field not in payload]
+    if missing:
+        raise RequestError(f"missing project field(s): {', '.join(missing)}")
+    if payload['climate'] not in CLIMATE_OPTIONS.values():
+        raise RequestError(f"invalid climate '{payload['climate']}'")
+    if payload['landfill_depth'] not in LANDFILL_OPTIONS.values():
+        raise RequestError(f"invalid landfill depth '{payload['landfill_depth']}'")
+    try:
+        return ProjectRecord.from_dict(payload)
+    except (TypeError, ValueError) as e:
+        raise RequestError(f"invalid project data: {e}")
+
+
+def evaluate_projects(projects, const):
+    """Evaluate a list of ProjectRecords with a single kernel call.
+
+    Returns one {'sums', 'results', 'total_co2_saved'} dict per project.
+    """
+    all_sums = [project.sums() for project in projects]
+    values = project_values(projects, const)
+    outputs = KERNEL([values[name] for name in KERNEL.inputs]).reshape(len(KERNEL.outputs), -1)
+    outputs = np.broadcast_to(outputs, (len(KERNEL.outputs), len(projects)))
+    totals = outputs[CO2_ROWS].sum(axis=0)
+
+    evaluated = []
+    for j, sums in enumerate(all_sums):
+        results = {calc_key: {} for calc_key in SECTIONS}
+        for i, (calc_key, key) in enumerate(KERNEL.outputs):
+            results[calc_key][key] = float(outputs[i, j])
+        evaluated.append({'sums': sums, 'results': results, TOTAL_CO2_OUTPUT[1]: float(totals[j])})
+    return evaluated
+
+
+def _error(e):
+    error = {'error': str(e)}
+    if isinstance(e, ProjectFileError):
+        error.update(line=e.line, column=e.column)
+    return error
+
+
+def _decode(body, content_type):
+    """Request body as JSON, or as CSV text for text/csv and text/plain bodies."""
+    text = body.decode('utf-8-sig')
+    if content_type.startswith('text/'):
+        return text
+    try:
+        return json.loads(text)
+    except ValueError as e:
+        raise RequestError(f"invalid JSON: {e}")
+
+
+def _kpis(payload, const):
+    return evaluate_projects([_project(payload)], const)[0]
+
+
+def _batch(payload, const):
+    if not isinstance(payload, dict) or not isinstance(payload.get('projects'), list):
+        raise RequestError("expected {\"projects\": [...]}")
+    projects, errors = [], {}
+    for i, project in enumerate(payload['projects']):
+        try:
+            projects.append((i, _project(project)))
+        except Exception as e:  # one malformed project is reported in its place, not as a failed request
+            errors[i] = _error(e)
+    results = evaluate_projects([project for _, project in projects], const) if projects else []
+    evaluated = dict(zip((i for i, _ in projects), results))
+    return {'results': [evaluated.get(i) or errors[i] for i in range(len(payload['projects']))]}
+
+
+def _parse(payload, const):
+    if isinstance(payload, dict) and 'csv' in payload:
+        payload = payload['csv']
+    if not isinstance(payload, str):
+        raise RequestError("expected project CSV text")
+    return parse_csv_file(payload).to_dict()
+
+
+def create_app(const=None, cache_size=1024):
+    """Create the ASGI application, evaluating with `const` (the global parameters by default)."""
+    const = const if const is not None else load_constants()
+    version = parameters_version(const)
+    cache = ResponseCache(cache_size)
+
+    def json_response(content, status_code=200):
+        return Response(json.dumps(content), status_code, media_type='application/json',
+                        headers={'X-Parameters-Version': version})
+
+    def cached_endpoint(handler):
+        async def endpoint(request):
+            body = await request.body()
+            content_type = request.headers.get('content-type', '')
+            key = hashlib.sha256(f"{request.url.path}\0{content_type}\0".encode() + body).hexdigest() + version
+            content = cache.get(key)
+            if content is None:
+                try:
+                    payload = _decode(body, content_type)
+                    # Parsing and evaluating are CPU bound; keep them off the event loop
+                    content = await run_in_threadpool(lambda: json.dumps(handler(payload, const)))
+                except (ValueError, TypeError) as e:  # includes ProjectFileError and RequestError
+                    return json_response(_error(e), 400)
+                cache.put(key, content)
+            return Response(content, media_type='application/json', headers={'X-Parameters-Version': version})
+        return endpoint
+
+    async def latex(request):
+        calc_key = request.path_params['calc_key']
+        if calc_key not in SECTIONS:
+            return json_response({'error': f"unknown section '{calc_key}'"}, 404)
+        return json_response({'section': calc_key, 'title': SECTIONS[calc_key]['title'],
+                              'latex': generate_latex(calc_key)})
+
+    async def health(request):
+        return json_response({'parameters_version': version, 'cache': cache.stats()})
+
+    app = Starlette(routes=[
+        Route('/kpis', cached_endpoint(_kpis), methods=['POST']),
+        Route('/batch', cached_endpoint(_batch), methods=['POST']),
+        Route('/parse', cached_endpoint(_parse), methods=['POST']),
+        Route('/latex/{calc_key}', latex, methods=['GET']),
+        Route('/health', health, methods=['GET']),
+    ])
+    app.state.cache = cache
+    app.state.parameters_version = version
+    return app
@@ -0,0 +1,186 @@
+"""
+Where parameter and project data files are read from.
+
+The FINISH_KPIS_DATA_SOURCE environment variable selects the source:
+- "package" (default): the files shipped in finish_mondial_kpis/data/, read through importlib.resources
+- a local directory laid out like the finish_mondial_kpis/ package (i.e. containing data/)
+- an http(s) base URL such as GITHUB_URL; downloads go through an on-disk cache keyed by
+  content hash and are revalidated with ETag/If-Modified-Since
+
+Only the remote source touches the network, so importing the package never does by default.
+"""
+import hashlib
+import io
+import json
+import os
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from importlib import resources
+
+DATA_SOURCE_ENV = 'FINISH_KPIS_DATA_SOURCE'
+CACHE_DIR_ENV = 'FINISH_KPIS_CACHE_DIR'
+GITHUB_URL = "https://raw.githubusercontent.com/dalyw/finish-mondial-kpis/refs/heads/main/finish_mondial_kpis/"
+
+# Remote sources cannot list a directory, so their projects are named explicitly
+REMOTE_PROJECT_FILES = ["arrp", "coonoor_mcc", "custom", "krrp"]
+
+
+def default_cache_dir():
+    """Directory for downloaded data and build artifacts."""
+    if os.environ.get(CACHE_DIR_ENV):
+        return os.environ[CACHE_DIR_ENV]
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'finish-mondial-kpis')
+
+
+def write_atomic(path, data):
+    """Write bytes to `path` so concurrent readers never see a partial file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class DataSource(ABC):
+    """Base class: read files by their path relative to the package root, e.g. "data/global_parameters.csv"."""
+    @abstractmethod
+    def read_bytes(self, relpath):
+        """Contents of the file at `relpath`."""
+
+    @abstractmethod
+    def list_projects(self):
+        """Names of the project files in data/projects/, without .csv."""
+
+    def read_text(self, relpath):
+        return self.read_bytes(relpath).decode('utf-8')
+
+    def open(self, relpath):
+        return io.BytesIO(self.read_bytes(relpath))
+
+
+class PackageSource(DataSource):
+    """Data files installed with the package."""
+    def _resource(self, relpath):
+        resource = resources.files('finish_mondial_kpis')
+        for part in relpath.split('/'):
+            resource = resource.joinpath(part)
+        return resource
+
+    def read_bytes(self, relpath):
+        return self._resource(relpath).read_bytes()
+
+    def list_projects(self):
+        return sorted(entry.name[:-len('.csv')] for entry in self._resource('data/projects').iterdir()
+                      if entry.name.endswith('.csv'))
+
+
+class DirectorySource(DataSource):
+    """Data files in a local checkout or copy of the package directory."""
+    def __init__(self, root):
+        self.root = root
+
+    def read_bytes(self, relpath):
+        with open(os.path.join(self.root, *relpath.split('/')), 'rb') as f:
+            return f.read()
+
+    def list_projects(self):
+        projects_dir = os.path.join(self.root, 'data', 'projects')
+        return sorted(name[:-len('.csv')] for name in os.listdir(projects_dir) if name.endswith('.csv'))
+
+
+class HTTPCache:
+    """On-disk cache of downloaded files.
+
+    Bodies are stored once under the SHA-256 of their content; a small index entry per URL
+    records that hash with the ETag/Last-Modified validators. Entries younger than `max_age`
+    seconds are served without a request, older ones are revalidated, and a cached copy is
+    served if the network is unavailable.
+    """
+    def __init__(self, directory=None, max_age=3600, timeout=10):
+        self.directory = directory or os.path.join(default_cache_dir(), 'http')
+        self.max_age = max_age
+        self.timeout = timeout
+
+    def _index_path(self, url):
+        return os.path.join(self.directory, 'index', hashlib.sha256(url.encode()).hexdigest() + '.json')
+
+    def _object_path(self, digest):
+        return os.path.join(self.directory, 'objects', digest)
+
+    def _read_cached(self, entry):
+        try:
+            with open(self._object_path(entry['sha256']), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _store(self, url, content, headers):
+        digest = hashlib.sha256(content).hexdigest()
+        if not os.path.exists(self._object_path(digest)):
+            write_atomic(self._object_path(digest), content)
+        entry = {
+            'sha256': digest,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'checked': time.time(),
+        }
+        write_atomic(self._index_path(url), json.dumps(entry).encode())
+
+    def get(self, url):
+        import requests
+
+        entry, cached = None, None
+        try:
+            with open(self._index_path(url)) as f:
+                entry = json.load(f)
+            cached = self._read_cached(entry)
+        except (OSError, ValueError):
+            pass
+        if cached is not None and time.time() - entry['checked'] < self.max_age:
+            return cached
+
+        headers = {}
+        if cached is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        try:
+            response = requests.get(url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304 and cached is not None:
+                self._store(url, cached, {'ETag': entry.get('etag'), 'Last-Modified': entry.get('last_modified')})
+                return cached
+            response.raise_for_status()
+        except requests.RequestException:
+            if cached is not None:
+                return cached
+            raise
+        self._store(url, response.content, response.headers)
+        return response.content
+
+
+class RemoteSource(DataSource):
+    """Data files served over http(s), fetched through an HTTPCache."""
+    def __init__(self, base_url, cache=None):
+        self.base_url = base_url if base_url.endswith('/') else base_url + '/'
+        self.cache = cache or HTTPCache()
+
+    def read_bytes(self, relpath):
+        return self.cache.get(self.base_url + relpath)
+
+    def list_projects(self):
+        return list(REMOTE_PROJECT_FILES)
+
+
+def get_data_source(spec=None):
+    """Create the data source named by `spec` (default: the FINISH_KPIS_DATA_SOURCE setting)."""
+    spec = spec or os.environ.get(DATA_SOURCE_ENV, 'package')
+    if spec == 'package':
+        return PackageSource()
+    if spec == 'github':
+        return RemoteSource(GITHUB_URL)
+    if spec.startswith(('http://', 'https://')):
+        return RemoteSource(spec)
+    return DirectorySource(spec)
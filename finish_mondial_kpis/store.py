@@ -0,0 +1,110 @@
+"""
+Persistent cache of calculation results in a local SQLite file, shared by the app and batch runs.
+
+Results are stored per project under a key combining the hashes of the quarterly data, land
+coverage, climate and landfill settings, the parameter set and the equations artifact, so an
+unchanged project is never evaluated twice and any edit simply misses. The file is bounded to
+`max_entries` projects, evicting the least recently used.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from .calculations import EQUATIONS
+from .sources import default_cache_dir
+
+STORE_FILENAME = 'results.sqlite3'
+
+
+def project_key(quarterly, land_coverage, climate, landfill_depth, const, equations_key=None):
+    """Cache key of one project's results.
+
+    `quarterly` is the (category x quarter) data array. Trailing quarters without any data are
+    ignored, so a project hashes the same however many empty years it is shown with.
+    """
+    quarterly = np.asarray(quarterly, dtype=float)
+    nonzero = np.flatnonzero(quarterly.any(axis=0))
+    quarterly = np.ascontiguousarray(quarterly[:, :nonzero[-1] + 1] if len(nonzero) else quarterly[:, :0])
+    digest = hashlib.sha256(quarterly.tobytes())
+    digest.update(repr((quarterly.shape, float(land_coverage), str(climate), str(landfill_depth),
+                        const.version, equations_key or EQUATIONS.key)).encode())
+    return digest.hexdigest()
+
+
+class ResultStore:
+    """Size-bounded LRU store of {calc_key: {result key: value}} results."""
+    def __init__(self, path=None, max_entries=100_000):
+        self.path = path or os.path.join(default_cache_dir(), STORE_FILENAME)
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # One connection per store, shared by the app's sessions behind a lock; batch workers each open their own
+        self._connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, results TEXT NOT NULL, last_used REAL NOT NULL)'
+        )
+        self._connection.execute('CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)')
+        self._lock = threading.Lock()
+        self._entries = self._count()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _count(self):
+        return self._connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def get(self, key):
+        """Stored results for `key`, or None."""
+        with self._lock:
+            row = self._connection.execute('SELECT results FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._connection.execute('UPDATE results SET last_used = ? WHERE key = ?', (time.time(), key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, results):
+        with self._lock:
+            self._connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?)',
+                                     (key, json.dumps(results), time.time()))
+            self._entries += 1
+            if self._entries > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        """Drop the least recently used entries down to 90% of the limit (other processes may have added some)."""
+        excess = self._count() - int(self.max_entries * 0.9)
+        if excess > 0:
+            self._connection.execute(
+                'DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_used LIMIT ?)', (excess,)
+            )
+            self.evictions += excess
+        self._entries = self._count()
+
+    def get_or_calculate(self, key, calculate):
+        """Stored results for `key`, calling `calculate()` and storing its results on a miss."""
+        results = self.get(key)
+        if results is None:
+            results = calculate()
+            self.put(key, results)
+        return results
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute('DELETE FROM results')
+            self._entries = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'entries': self._entries, 'max_entries': self.max_entries, 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0, 'evictions': self.evictions}
+
+    def close(self):
+        self._connection.close()
@@ -0,0 +1,128 @@
+"""
+Monte Carlo uncertainty analysis of the KPIs.
+
+Each global parameter may declare a distribution in the `distribution` and `spread` columns of
+global_parameters.csv (spread is relative to the value):
+- normal: standard deviation spread * value (clipped at zero)
+- uniform: between value * (1 - spread) and value * (1 + spread)
+- triangular: mode at value, bounds as for uniform
+- lognormal: median at value, log-space standard deviation spread
+
+Samples are drawn as NumPy arrays and every section is evaluated at once with the compiled
+kernel, chunk by chunk, so memory use depends on `chunk_size` rather than the number of draws.
+"""
+import numpy as np
+import pandas as pd
+
+from .calculations import CO2_ROWS, TOTAL_CO2_OUTPUT
+
+DISTRIBUTIONS = ('normal', 'uniform', 'triangular', 'lognormal')
+
+
+def sample(rng, distribution, value, spread, size):
+    """Draw `size` samples around `value` from the named distribution."""
+    if distribution == 'normal':
+        return np.maximum(rng.normal(value, abs(value) * spread, size), 0.0)
+    if distribution == 'uniform':
+        return rng.uniform(value * (1 - spread), value * (1 + spread), size)
+    if distribution == 'triangular':
+        low, high = sorted((value * (1 - spread), value * (1 + spread)))
+        return rng.triangular(low, value, high, size)
+    if distribution == 'lognormal':
+        return value * rng.lognormal(0.0, spread, size)
+    raise ValueError(f"Unknown distribution '{distribution}', expected one of {', '.join(DISTRIBUTIONS)}")
+
+
+def input_distributions(kernel, const, landfill_parameter, default=None):
+    """Map kernel inputs to the (distribution, spread) of the constants feeding them.
+
+    `landfill_parameter` names the constant selected as the landfill conversion factor.
+    `default` is applied to constants without their own distribution, except unit conversions.
+    """
+    distributions = {}
+    for name in kernel.inputs:
+        parameter = landfill_parameter if name == 'landfill_conversion_factor' else name
+        if parameter not in const:
+            continue
+        distribution, spread = const[parameter].distribution, const[parameter].spread
+        if not distribution and default is not None and const[parameter].section != 'Conversions':
+            distribution, spread = default
+        if distribution and spread:
+            distributions[name] = (distribution, spread)
+    return distributions
+
+
+def _chunks(n_samples, chunk_size, seed):
+    """Yield (size, generator) per chunk; the same seed always yields the same draws."""
+    n_chunks = -(-n_samples // chunk_size)
+    for i, seed_sequence in enumerate(np.random.SeedSequence(seed).spawn(n_chunks)):
+        yield min(chunk_size, n_samples - i * chunk_size), np.random.default_rng(seed_sequence)
+
+
+def _evaluate_chunk(kernel, values, distributions, size, rng):
+    params = [sample(rng, distributions[name][0], values[name], distributions[name][1], size)
+              if name in distributions else values[name] for name in kernel.inputs]
+    outputs = kernel(params).reshape(len(kernel.outputs), -1)  # (outputs, 1) if nothing is sampled
+    outputs = np.broadcast_to(outputs, (len(kernel.outputs), size))
+    return np.vstack([outputs, outputs[CO2_ROWS].sum(axis=0)])
+
+
+def _histogram_percentiles(counts, low, width, percentiles, n_samples):
+    """Interpolate percentiles from per-row histograms of shape (rows, bins)."""
+    cumulative = np.cumsum(counts, axis=1)
+    result = np.empty((counts.shape[0], len(percentiles)))
+    for j, percentile in enumerate(percentiles):
+        target = percentile / 100 * n_samples
+        for row in range(counts.shape[0]):
+            b = min(np.searchsorted(cumulative[row], target), counts.shape[1] - 1)
+            below = cumulative[row, b - 1] if b else 0
+            fraction = (target - below) / counts[row, b] if counts[row, b] else 0.0
+            result[row, j] = low[row] + (b + fraction) * width[row]
+    return result
+
+
+def monte_carlo(kernel, values, distributions, n_samples, chunk_size=100_000, seed=None,
+                percentiles=(5, 50, 95), bins=4096):
+    """Sample the parameters and summarize every KPI and the total CO2 saved.
+
+    `kernel` is the calculation KERNEL (or one with the same outputs). `values` holds the point
+    estimate of every kernel input and `distributions` the (distribution, spread) of the inputs
+    to vary. Percentiles are exact when all draws fit in
+    one chunk. Otherwise each KPI is binned into `bins` bins spanning the first chunk's range
+    (widened by 10%), which resolves any percentile not in the outermost 1/chunk_size tails.
+    Returns a DataFrame indexed by (section, KPI key) with mean, std and the percentiles.
+    """
+    outputs = list(kernel.outputs) + [TOTAL_CO2_OUTPUT]
+    rows = len(outputs)
+
+    total = np.zeros(rows)
+    total_sq = np.zeros(rows)
+    counts = None
+    for size, rng in _chunks(n_samples, chunk_size, seed):
+        chunk = _evaluate_chunk(kernel, values, distributions, size, rng)
+        total += chunk.sum(axis=1)
+        total_sq += np.square(chunk).sum(axis=1)
+        if size == n_samples:
+            result = np.percentile(chunk, percentiles, axis=1).T
+            break
+        if counts is None:
+            low, high = chunk.min(axis=1), chunk.max(axis=1)
+            margin = 0.1 * (high - low)
+            low, high = low - margin, high + margin
+            width = np.where(high > low, (high - low) / bins, 1.0)
+            counts = np.zeros((rows, bins), dtype=np.int64)
+            offsets = np.arange(rows)[:, None] * bins
+        index = np.clip(((chunk - low[:, None]) / width[:, None]).astype(np.int64), 0, bins - 1)
+        counts += np.bincount((index + offsets).ravel(), minlength=rows * bins).reshape(rows, bins)
+    else:
+        result = _histogram_percentiles(counts, low, width, percentiles, n_samples)
+        constant = high <= low
+        result[constant] = low[constant, None]
+
+    mean = total / n_samples
+    std = np.sqrt(np.maximum(total_sq / n_samples - mean ** 2, 0.0))
+    summary = pd.DataFrame(result, columns=[f'p{p:g}' for p in percentiles],
+                           index=pd.MultiIndex.from_tuples(outputs, names=['section', 'kpi']))
+    summary.insert(0, 'std', std)
+    summary.insert(0, 'mean', mean)
+    return summary
@@ -0,0 +1,22 @@
+"""
+Bulk uploads: a file that fails to parse is reported and the others still load.
+"""
+import io
+
+from finish_mondial_kpis.bulk import parse_uploads
+from finish_mondial_kpis.projects import create_csv_template
+
+
+def _upload(name, text):
+    upload = io.BytesIO(text.encode('utf-8'))
+    upload.name = name
+    return upload
+
+
+def test_malformed_file_is_reported_per_file():
+    good = create_csv_template(1)
+    bad = good.replace('Category,Y1Q1,Y1Q2,Y1Q3,Y1Q4', 'Category,Y0Q1')
+    assert bad != good
+    result = parse_uploads([_upload('good.csv', good), _upload('bad.csv', bad)])
+    assert list(result.projects) == ['good']
+    assert list(result.errors) == ['bad.csv']
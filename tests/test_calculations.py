@@ -0,0 +1,36 @@
+"""
+Per-quarter series of the results by calculate_series.
+"""
+import numpy as np
+import pytest
+
+from finish_mondial_kpis.calculations import (KERNEL, TOTAL_CO2_OUTPUT, calculate, calculate_series, load_constants,
+                                              total_co2_saved)
+from finish_mondial_kpis.projects import ProjectRecord, get_quarterly_colnames
+
+
+def _project():
+    project = ProjectRecord.empty(3, land_coverage=750.0)
+    project.quarterly[:] = np.random.default_rng(0).uniform(0, 100, project.quarterly.shape)
+    return project
+
+
+def test_cumulative_total_equals_calculate():
+    const, project = load_constants(), _project()
+    factor = const.value(project.conversion_factor_name)
+    series = calculate_series(project.quarterly, get_quarterly_colnames(3), const, factor, project.land_coverage)
+    results = calculate(project.sums(), const, factor, project.land_coverage)
+    assert series.cumulative[TOTAL_CO2_OUTPUT].iloc[-1] == pytest.approx(total_co2_saved(results), rel=1e-9)
+    for calc_key, key in KERNEL.outputs:
+        assert series.cumulative[(calc_key, key)].iloc[-1] == pytest.approx(results[calc_key][key], rel=1e-9)
+    assert series.yearly[TOTAL_CO2_OUTPUT].sum() == pytest.approx(total_co2_saved(results), rel=1e-9)
+
+
+def test_land_coverage_is_spread_evenly():
+    const = load_constants()
+    project = ProjectRecord.empty(2, land_coverage=800.0)  # no data: only the land coverage contributes
+    factor = const.value(project.conversion_factor_name)
+    series = calculate_series(project.quarterly, get_quarterly_colnames(2), const, factor, project.land_coverage)
+    per_quarter = calculate(project.sums(), const, factor, project.land_coverage / 8)
+    assert total_co2_saved(per_quarter) != 0
+    np.testing.assert_allclose(series.quarterly[TOTAL_CO2_OUTPUT], total_co2_saved(per_quarter), rtol=1e-12)
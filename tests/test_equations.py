@@ -0,0 +1,29 @@
+"""
+Caching of the equations artifact.
+"""
+import os
+
+from finish_mondial_kpis.equations import MAX_ARTIFACTS, artifact_key, artifact_path, load_equations, prune_artifacts
+
+
+def test_prune_keeps_most_recently_used(tmp_path):
+    for i in range(MAX_ARTIFACTS + 3):
+        path = tmp_path / f'equations-{i:016x}.json'
+        path.write_text('{}')
+        os.utime(path, (1000 + i, 1000 + i))
+    (tmp_path / 'results.sqlite3').write_text('')
+    prune_artifacts(str(tmp_path))
+    kept = sorted(path.name for path in tmp_path.glob('equations-*.json'))
+    assert kept == [f'equations-{i:016x}.json' for i in range(3, MAX_ARTIFACTS + 3)]
+    assert (tmp_path / 'results.sqlite3').exists()
+
+
+def test_loading_marks_the_artifact_used(tmp_path):
+    other = tmp_path / 'equations-0000000000000000.json'  # another data source's artifact
+    other.write_text('{}')
+    path = artifact_path(artifact_key(), str(tmp_path))
+    load_equations(str(tmp_path))
+    assert other.exists()
+    os.utime(path, (1000, 1000))
+    load_equations(str(tmp_path))
+    assert os.path.getmtime(path) > 1000
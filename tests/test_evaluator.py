@@ -0,0 +1,33 @@
+"""
+Incremental evaluation of the sections by Evaluator.
+"""
+import pytest
+
+from finish_mondial_kpis.calculations import SECTIONS, calculate, load_constants, parameter_values
+from finish_mondial_kpis.evaluator import Evaluator
+from finish_mondial_kpis.mappings import DATA_CATEGORIES
+
+SUMS = {f'total_{category}': 100.0 * (i + 1) for i, category in enumerate(DATA_CATEGORIES)}
+
+
+def test_single_parameter_edit_recomputes_its_section_only():
+    const = load_constants()
+    evaluator = Evaluator()
+    evaluator.evaluate(parameter_values(SUMS, const, 0.85, 500.0))
+    assert evaluator.recomputed == list(SECTIONS)
+
+    edited = const.with_values({'plastic_emission_factor': const.value('plastic_emission_factor') * 2})
+    evaluator.evaluate(parameter_values(SUMS, edited, 0.85, 500.0))
+    assert evaluator.recomputed == ['h']
+    assert evaluator.cached == [calc_key for calc_key in SECTIONS if calc_key != 'h']
+
+
+def test_results_equal_calculate():
+    const = load_constants()
+    evaluator = Evaluator()
+    for factor in [0.85, 0.5, 0.85]:
+        results = evaluator.evaluate(parameter_values(SUMS, const, factor, 500.0))
+        expected = calculate(SUMS, const, factor, 500.0)
+        assert results.keys() == expected.keys()
+        for calc_key, section in expected.items():
+            assert results[calc_key] == pytest.approx(section, rel=1e-12)
@@ -0,0 +1,20 @@
+"""
+Importing the package must not import sympy once the equations artifact is built.
+"""
+import os
+import subprocess
+import sys
+
+IMPORTS = """
+import sys
+import finish_mondial_kpis, finish_mondial_kpis.calculations, finish_mondial_kpis.batch, finish_mondial_kpis.cli
+assert 'sympy' not in sys.modules, 'sympy was imported'
+"""
+
+
+def test_import_without_sympy(tmp_path):
+    env = dict(os.environ, FINISH_KPIS_CACHE_DIR=str(tmp_path))
+    subprocess.run([sys.executable, '-m', 'finish_mondial_kpis.cli', 'build'], env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+    result = subprocess.run([sys.executable, '-c', IMPORTS], env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
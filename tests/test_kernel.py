@@ -0,0 +1,29 @@
+"""
+The compiled kernel against sympy substitution of the calculation definitions.
+"""
+import numpy as np
+import pytest
+
+from finish_mondial_kpis import expressions
+from finish_mondial_kpis.calculations import SECTIONS, calculate, load_constants
+from finish_mondial_kpis.equations import result_key
+from finish_mondial_kpis.mappings import DATA_CATEGORIES
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_calculate_matches_subs(seed):
+    rng = np.random.default_rng(seed)
+    const = load_constants()
+    const = const.with_values({name: rng.uniform(0.1, 10) for name in const})
+    sums = {f'total_{category}': rng.uniform(0, 1000) for category in DATA_CATEGORIES}
+    factor, land_coverage = rng.uniform(0.1, 1), rng.uniform(0, 1000)
+    values = {**sums, **{name: const.value(name) for name in const},
+              'landfill_conversion_factor': factor, 'land_coverage': land_coverage}
+
+    results = calculate(sums, const, factor, land_coverage)
+    assert set(results) == set(SECTIONS)
+    for calc_key, calc in expressions.CALCULATION_EXPRESSIONS.items():
+        for label, equation in calc['equations'].items():
+            expression = equation['expression']
+            expected = float(expression.subs({symbol: values[symbol.name] for symbol in expression.free_symbols}))
+            assert results[calc_key][result_key(label)] == pytest.approx(expected, rel=1e-9)
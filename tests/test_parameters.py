@@ -0,0 +1,42 @@
+"""
+ParameterSet and per-session ParameterOverlay edits.
+"""
+import pytest
+
+from finish_mondial_kpis.calculations import load_constants
+from finish_mondial_kpis.parameters import ParameterOverlay
+
+
+def test_values_are_read_only():
+    const = load_constants()
+    with pytest.raises(ValueError):
+        const.values_array[0] = 1.0
+    with pytest.raises(TypeError):
+        const['kg_per_ton'] = 1.0
+
+
+def test_version_equality_and_hash():
+    const = load_constants()
+    assert load_constants().version == const.version
+    same = const.with_values({'kg_per_ton': const.value('kg_per_ton')})
+    assert same.version == const.version and same == const and hash(same) == hash(const)
+
+    edited = const.with_values({'kg_per_ton': 999.0})
+    assert edited.version != const.version and edited != const
+    assert edited.value('kg_per_ton') == 999.0 and const.value('kg_per_ton') == 1000.0
+    assert len({const, same, edited}) == 2
+
+
+def test_overlay_set_and_reset():
+    base = load_constants()
+    overlay = ParameterOverlay(base)
+    assert overlay.parameters is base
+    overlay.set('kg_per_ton', 500)
+    assert overlay.overrides == {'kg_per_ton': 500.0}
+    assert overlay.parameters.value('kg_per_ton') == 500.0 and overlay.parameters != base
+    overlay.set('kg_per_ton', base.value('kg_per_ton'))
+    assert overlay.overrides == {} and overlay.parameters == base
+
+    overlay.set('kg_per_ton', 500)
+    overlay.reset()
+    assert overlay.overrides == {} and overlay.parameters is base
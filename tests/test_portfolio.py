@@ -0,0 +1,39 @@
+"""
+Importing project CSVs into a portfolio.
+"""
+import pytest
+
+from finish_mondial_kpis.calculations import load_constants
+from finish_mondial_kpis.portfolio import import_projects
+from finish_mondial_kpis.projects import create_csv_template
+
+
+def _project_files(tmp_path):
+    files = []
+    for directory in ['a', 'b']:
+        (tmp_path / directory).mkdir()
+        file = tmp_path / directory / 'p.csv'
+        file.write_text(create_csv_template(1))
+        files.append(str(file))
+    return files
+
+
+def test_duplicate_names_are_reported(tmp_path):
+    files = _project_files(tmp_path)
+    errors = []
+    portfolio = import_projects(files, str(tmp_path / 'portfolio'), on_error=lambda file, e: errors.append(file))
+    assert len(portfolio) == 1
+    assert errors == [files[1]]
+
+
+def test_duplicate_names_raise_without_on_error(tmp_path):
+    with pytest.raises(ValueError, match='duplicate project name'):
+        import_projects(_project_files(tmp_path), str(tmp_path / 'portfolio'))
+
+
+def test_empty_portfolio(tmp_path):
+    bad = tmp_path / 'bad.csv'
+    bad.write_text('junk\n')
+    portfolio = import_projects([str(bad)], str(tmp_path / 'portfolio'), on_error=lambda file, e: None)
+    assert len(portfolio) == 0
+    assert portfolio.co2_by_year(load_constants()).empty
@@ -0,0 +1,58 @@
+"""
+Validation of project CSV files by parse_csv_file.
+"""
+import numpy as np
+import pytest
+
+from finish_mondial_kpis.mappings import Climate, LandfillDepth
+from finish_mondial_kpis.projects import (MAX_YEARS, ProjectFileError, ProjectRecord, create_csv_template, format_csv,
+                                         parse_csv_file)
+
+
+def _csv(header, value='1.0', land_coverage='500'):
+    lines = create_csv_template(1).splitlines()
+    lines[7] = f'{land_coverage},,,'
+    columns = header.split(',')
+    lines[-5:] = [','.join(['Category'] + columns)] + [
+        ','.join([row.split(',')[0]] + [value] * len(columns)) for row in lines[-4:]
+    ]
+    return '\n'.join(lines)
+
+
+def test_template_parses():
+    project = parse_csv_file(_csv('Y1Q1,Y1Q2,Y1Q3,Y1Q4'))
+    assert project.num_years == 1
+    assert project.quarterly.sum() == 16.0
+
+
+@pytest.mark.parametrize('header, column, message', [
+    ('Y0Q1', 2, "between 1"),
+    ('Y0Q1,Y1Q1,Y1Q2,Y1Q3,Y1Q4', 2, "between 1"),
+    ('Y1Q1,Y1Q1', 3, "duplicate column 'Y1Q1'"),
+    (f'Y{MAX_YEARS + 1}Q1', 2, f"and {MAX_YEARS}"),
+    ('Y2000000Q1', 2, f"and {MAX_YEARS}"),
+])
+def test_invalid_header(header, column, message):
+    with pytest.raises(ProjectFileError, match=message) as error:
+        parse_csv_file(_csv(header))
+    assert error.value.line == 11
+    assert error.value.column == column
+
+
+@pytest.mark.parametrize('value', ['nan', 'inf', '-inf', '-1'])
+def test_invalid_value(value):
+    with pytest.raises(ProjectFileError, match="non-negative") as error:
+        parse_csv_file(_csv('Y1Q1,Y1Q2', value))
+    assert (error.value.line, error.value.column) == (12, 2)
+
+
+@pytest.mark.parametrize('land_coverage', ['nan', 'inf', '-5'])
+def test_invalid_land_coverage(land_coverage):
+    with pytest.raises(ProjectFileError, match="land coverage"):
+        parse_csv_file(_csv('Y1Q1', land_coverage=land_coverage))
+
+
+def test_format_csv_round_trip():
+    quarterly = np.random.default_rng(0).uniform(0, 1e6, (4, 8))
+    project = ProjectRecord(Climate.DRY, LandfillDepth.SHALLOW, 1234567.8, quarterly)
+    assert parse_csv_file(format_csv(project)) == project
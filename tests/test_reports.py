@@ -0,0 +1,42 @@
+"""
+Writing project reports.
+"""
+import io
+import zipfile
+
+import pytest
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+from finish_mondial_kpis.calculations import load_constants
+from finish_mondial_kpis.projects import ProjectRecord
+from finish_mondial_kpis.reports import (WORKBOOK_NAME, ProjectReport, project_report, report_archive, workbook_available,
+                                        write_reports)
+
+
+def test_duplicate_report_names_are_not_overwritten():
+    reports = [ProjectReport('p', {}, 'first'), ProjectReport('q', {}, 'other'), ProjectReport('P', {}, 'second')]
+    saved, errors = {}, []
+    written = write_reports(reports, saved.__setitem__, on_error=lambda name, e: errors.append(name))
+    assert written == 2
+    assert saved == {'p.md': 'first', 'q.md': 'other'}
+    assert errors == ['P']
+    with pytest.raises(ValueError, match='duplicate report name'):
+        write_reports(reports, {}.__setitem__)
+
+
+def test_report_archive_is_accepted_by_download_button():
+    workbook = workbook_available()
+    projects = [('a', ProjectRecord.empty(1)), ('b', ProjectRecord.empty(2))]
+    archive = report_archive(projects, load_constants(), workbook=workbook)
+    data, _ = convert_data_to_bytes_and_infer_mime(archive, TypeError("unsupported type"))
+    names = zipfile.ZipFile(io.BytesIO(data)).namelist()
+    assert names == ['a.md', 'b.md'] + ([WORKBOOK_NAME] if workbook else [])
+
+
+def test_project_report_numbers_are_not_in_scientific_notation():
+    project = ProjectRecord.empty(1, land_coverage=1234567.8)
+    project.quarterly[:] = 987654.3
+    text = project_report('p', project, load_constants())
+    assert '| Land coverage | 1,234,567.80 acres |' in text
+    assert '3,950,617.20' in text
+    assert 'e+' not in text and 'e-0' not in text
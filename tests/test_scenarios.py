@@ -0,0 +1,27 @@
+"""
+Scenario grids against calculate for each combination.
+"""
+import pytest
+
+from finish_mondial_kpis.calculations import (KERNEL, TOTAL_CO2_OUTPUT, calculate, load_constants, output_name,
+                                              parameter_values, total_co2_saved)
+from finish_mondial_kpis.mappings import DATA_CATEGORIES
+from finish_mondial_kpis.scenarios import evaluate_grid
+
+SUMS = {f'total_{category}': 100.0 * (i + 1) for i, category in enumerate(DATA_CATEGORIES)}
+
+
+def test_grid_rows_equal_calculate():
+    const = load_constants()
+    values = parameter_values(SUMS, const, const.value('tropical_wet_deep'), 500.0)
+    sweep = [0.5 * const.value('plastic_emission_factor'), 2 * const.value('plastic_emission_factor')]
+    grid = evaluate_grid(values, const, ['tropical_wet', 'dry_climate'], ['shallow', 'deep'], [100.0, 500.0, 900.0],
+                         {'plastic_emission_factor': sweep})
+    assert len(grid) == 2 * 2 * 3 * 2
+    for row in grid.to_dict('records'):
+        scenario = const.with_values({'plastic_emission_factor': row['plastic_emission_factor']})
+        results = calculate(SUMS, scenario, const.value(f"{row['climate']}_{row['landfill_depth']}"),
+                            row['land_coverage'])
+        for calc_key, key in KERNEL.outputs:
+            assert row[output_name((calc_key, key))] == pytest.approx(results[calc_key][key], rel=1e-12)
+        assert row[output_name(TOTAL_CO2_OUTPUT)] == pytest.approx(total_co2_saved(results), rel=1e-12)
@@ -0,0 +1,30 @@
+"""
+Elasticities from the gradient kernel against finite differences of calculate.
+"""
+import pytest
+
+from finish_mondial_kpis.calculations import calculate, load_constants, parameter_values, total_co2_saved
+from finish_mondial_kpis.mappings import DATA_CATEGORIES
+from finish_mondial_kpis.sensitivity import elasticities, sensitivity_inputs
+
+SUMS = {f'total_{category}': 100.0 * (i + 1) for i, category in enumerate(DATA_CATEGORIES)}
+
+
+def _total(const, factor, land_coverage, changes):
+    const = const.with_values({name: value for name, value in changes.items() if name in const})
+    return total_co2_saved(calculate(SUMS, const, changes.get('landfill_conversion_factor', factor),
+                                     changes.get('land_coverage', land_coverage)))
+
+
+def test_elasticities_match_central_differences():
+    const = load_constants()
+    factor, land_coverage = const.value('tropical_wet_deep'), 500.0
+    values = parameter_values(SUMS, const, factor, land_coverage)
+    names = sensitivity_inputs(const)
+    result = elasticities(values, names)
+    base = _total(const, factor, land_coverage, {})
+    step = 1e-6
+    for name, elasticity in zip(names, result):
+        low = _total(const, factor, land_coverage, {name: values[name] * (1 - step)})
+        high = _total(const, factor, land_coverage, {name: values[name] * (1 + step)})
+        assert elasticity == pytest.approx((high - low) / (2 * step * base), rel=1e-5, abs=1e-8), name
@@ -0,0 +1,25 @@
+"""
+Per-project errors of the service's batch endpoint.
+"""
+import pytest
+
+pytest.importorskip('starlette')
+
+from finish_mondial_kpis.calculations import load_constants
+from finish_mondial_kpis.projects import ProjectRecord, create_csv_template
+from finish_mondial_kpis.service import _batch
+
+
+def test_batch_reports_malformed_projects_per_item():
+    good = ProjectRecord.empty(1).to_dict()
+    projects = [
+        good,
+        create_csv_template(1).replace('Y1Q1', 'Y0Q1'),
+        dict(good, num_years=10 ** 9),
+        dict(good, compost_y1q1=float('nan')),
+        dict(good, land_coverage=-1),
+        create_csv_template(1),
+    ]
+    results = _batch({'projects': projects}, load_constants())['results']
+    assert [('error' in result) for result in results] == [False, True, True, True, True, False]
+    assert 'num_years' in results[2]['error']
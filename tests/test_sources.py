@@ -0,0 +1,75 @@
+"""
+Revalidation and offline fallback of the HTTPCache, against a stubbed requests.get.
+"""
+import pytest
+import requests
+
+from finish_mondial_kpis.sources import HTTPCache
+
+URL = 'https://example.com/data/global_parameters.csv'
+
+
+class Response:
+    def __init__(self, status_code, content=b'', headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Queue of responses (or exceptions) for requests.get; `requests` records the headers sent."""
+    class Server:
+        responses = []
+        requests = []
+
+        def get(self, url, headers=None, timeout=None):
+            self.requests.append(headers)
+            response = self.responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+    server = Server()
+    monkeypatch.setattr(requests, 'get', server.get)
+    return server
+
+
+def test_revalidation_reuses_cached_body(tmp_path, server):
+    cache = HTTPCache(str(tmp_path), max_age=0)
+    server.responses.append(Response(200, b'v1', {'ETag': '"abc"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'}))
+    assert cache.get(URL) == b'v1'
+    assert server.requests == [{}]
+
+    server.responses.append(Response(304))
+    assert cache.get(URL) == b'v1'
+    assert server.requests[1] == {'If-None-Match': '"abc"', 'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'}
+
+    server.responses.append(Response(200, b'v2', {'ETag': '"def"'}))
+    assert cache.get(URL) == b'v2'
+    assert server.requests[2]['If-None-Match'] == '"abc"'  # validators kept by the 304
+
+
+def test_fresh_entries_are_served_without_a_request(tmp_path, server):
+    cache = HTTPCache(str(tmp_path), max_age=3600)
+    server.responses.append(Response(200, b'v1'))
+    assert cache.get(URL) == b'v1'
+    assert cache.get(URL) == b'v1'
+    assert len(server.requests) == 1
+
+
+def test_offline_fallback_to_cached_copy(tmp_path, server):
+    cache = HTTPCache(str(tmp_path), max_age=0)
+    server.responses.append(Response(200, b'v1'))
+    assert cache.get(URL) == b'v1'
+    server.responses += [requests.ConnectionError("offline"), Response(503)]
+    assert cache.get(URL) == b'v1'
+    assert cache.get(URL) == b'v1'
+
+    server.responses.append(requests.ConnectionError("offline"))
+    with pytest.raises(requests.ConnectionError):
+        HTTPCache(str(tmp_path / 'empty'), max_age=0).get(URL)
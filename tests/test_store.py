@@ -0,0 +1,60 @@
+"""
+The persistent result store and its project keys.
+"""
+from finish_mondial_kpis.calculations import calculate, load_constants
+from finish_mondial_kpis.projects import ProjectRecord
+from finish_mondial_kpis.store import ResultStore, project_key
+
+
+def _key(project, const):
+    return project_key(project.quarterly, project.land_coverage, project.climate, project.landfill_depth, const)
+
+
+def _results(project, const):
+    return calculate(project.sums(), const, const.value(project.conversion_factor_name), project.land_coverage)
+
+
+def test_hit_after_put_and_miss_after_parameter_change(tmp_path):
+    const = load_constants()
+    project = ProjectRecord.empty(1)
+    project.quarterly[:] = 10.0
+    store = ResultStore(str(tmp_path / 'results.sqlite3'))
+    key = _key(project, const)
+    assert store.get(key) is None
+    store.put(key, _results(project, const))
+    assert store.get(key) == _results(project, const)
+
+    edited = const.with_values({'plastic_emission_factor': 1.0})
+    assert edited.version != const.version
+    assert store.get(_key(project, edited)) is None
+    assert store.stats() == {'entries': 1, 'max_entries': 100_000, 'hits': 1, 'misses': 2, 'hit_rate': 1 / 3,
+                             'evictions': 0}
+
+
+def test_lru_eviction(tmp_path):
+    store = ResultStore(str(tmp_path / 'results.sqlite3'), max_entries=10)
+    for i in range(10):
+        store.put(f'key{i}', {'a': {'value': i}})
+    assert store.get('key0') is not None  # now the most recently used
+    store.put('key10', {'a': {'value': 10}})
+    # Evicted down to 90% of the limit, least recently used first
+    assert store.stats()['entries'] == 9
+    assert store.stats()['evictions'] == 2
+    assert store.get('key1') is None and store.get('key2') is None
+    assert store.get('key0') is not None and store.get('key10') is not None
+    assert ResultStore(store.path, max_entries=10).stats()['entries'] == 9
+
+
+def test_project_key_is_stable():
+    const = load_constants()
+    project = ProjectRecord.empty(2, land_coverage=123.0)
+    project.quarterly[0, 0] = 5.0
+    same = ProjectRecord.from_dict(project.to_dict())
+    assert same == project and same is not project
+    assert _key(same, const) == _key(project, const)
+    # Trailing empty years do not change the key; any data or setting does
+    longer = ProjectRecord.empty(5, land_coverage=123.0)
+    longer.quarterly[0, 0] = 5.0
+    assert _key(longer, const) == _key(project, const)
+    project.land_coverage = 124.0
+    assert _key(project, const) != _key(longer, const)
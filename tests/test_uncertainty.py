@@ -0,0 +1,45 @@
+"""
+Monte Carlo percentiles, exact in one chunk and from histograms over several.
+"""
+import numpy as np
+
+from finish_mondial_kpis.calculations import KERNEL, load_constants, parameter_values
+from finish_mondial_kpis.mappings import DATA_CATEGORIES
+from finish_mondial_kpis.uncertainty import _chunks, _evaluate_chunk, input_distributions, monte_carlo
+
+PERCENTILES = (5, 50, 95)
+
+
+def _inputs():
+    const = load_constants()
+    sums = {f'total_{category}': 100.0 * (i + 1) for i, category in enumerate(DATA_CATEGORIES)}
+    values = parameter_values(sums, const, const.value('tropical_wet_deep'), 500.0)
+    return values, input_distributions(KERNEL, const, 'tropical_wet_deep', default=('normal', 0.2))
+
+
+def _draws(values, distributions, n_samples, chunk_size, seed):
+    return np.hstack([_evaluate_chunk(KERNEL, values, distributions, size, rng)
+                      for size, rng in _chunks(n_samples, chunk_size, seed)])
+
+
+def test_single_chunk_is_exact():
+    values, distributions = _inputs()
+    summary = monte_carlo(KERNEL, values, distributions, 5_000, chunk_size=5_000, seed=1, percentiles=PERCENTILES)
+    draws = _draws(values, distributions, 5_000, 5_000, 1)
+    np.testing.assert_array_equal(summary[['p5', 'p50', 'p95']].to_numpy(), np.percentile(draws, PERCENTILES, axis=1).T)
+    np.testing.assert_allclose(summary['mean'], draws.mean(axis=1), rtol=1e-12)
+
+
+def test_histogram_percentiles_within_bin_tolerance():
+    values, distributions = _inputs()
+    n_samples, chunk_size, bins = 50_000, 5_000, 4096
+    summary = monte_carlo(KERNEL, values, distributions, n_samples, chunk_size=chunk_size, seed=2,
+                          percentiles=PERCENTILES, bins=bins)
+    draws = _draws(values, distributions, n_samples, chunk_size, 2)
+    exact = np.percentile(draws, PERCENTILES, axis=1).T
+    # Bins span the first chunk's range widened by 10% on each side
+    first = draws[:, :chunk_size]
+    width = 1.2 * (first.max(axis=1) - first.min(axis=1)) / bins
+    assert np.all(np.abs(summary[['p5', 'p50', 'p95']].to_numpy() - exact) <= width[:, None] + 1e-9)
+    np.testing.assert_allclose(summary['mean'], draws.mean(axis=1), rtol=1e-9)
+    np.testing.assert_allclose(summary['std'], draws.std(axis=1), rtol=1e-6, atol=1e-9)